@@ -0,0 +1,400 @@
+"""
+Writes synthetic .semodel captures with the byte layout of NeverSerender's SpaceModelWriter.
+"""
+from __future__ import annotations
+
+import math
+import random
+import struct
+
+from argparse import ArgumentParser
+from typing import BinaryIO, Callable
+
+import numpy as np
+
+MAJOR_VERSION = 1
+MINOR_VERSION = 3
+MAGIC = b'nSEr'
+
+Vec3 = tuple[float, float, float]
+Mat4 = tuple[float, ...]
+"""
+Row major 4×4 matrix with the translation in the last row, like VRageMath
+"""
+
+class EventId:
+    End      = 0x0000
+    Advance  = 0x0010
+    Texture  = 0x0020
+    Material = 0x0030
+    Model    = 0x0040
+    Entity   = 0x0050
+    Block    = 0x0051
+    Light    = 0x0060
+
+class PropertyId:
+    EndHeader         = 0x0000
+    Id                = 0x0108
+    Name              = 0x02FF
+    Author            = 0x03FF
+    Path              = 0x04FF
+    Matrix            = 0x0540
+    MatrixD           = 0x0580
+    TextureType       = 0x0601
+    Vertices          = 0x07FF
+    Normals           = 0x08FF
+    TexCoords         = 0x09FF
+    Indices           = 0x0AFF
+    Meshes            = 0x0BFF
+    MaterialOverrides = 0x0CFF
+    Model             = 0x0D04
+    Color             = 0x0E0C
+    ColorMask         = 0x0E03
+    Delta             = 0x0F04
+    Cone              = 0x1008
+    Scale             = 0x1104
+    Remove            = 0x1200
+    Preview           = 0x1301
+    Parent            = 0x1404
+    Show              = 0x1501
+    RenderMode        = 0x1601
+    Texture           = 0x1705
+    Vector3           = 0x180C
+    Vector3S          = 0x1806
+    Orientation       = 0x1901
+
+_U8    = struct.Struct('>B')
+_U16   = struct.Struct('>H')
+_U32   = struct.Struct('>I')
+_I64   = struct.Struct('>q')
+_F32   = struct.Struct('>f')
+_VEC2F = struct.Struct('>ff')
+_VEC3F = struct.Struct('>fff')
+_VEC3B = struct.Struct('>BBB')
+_VEC3S = struct.Struct('>hhh')
+_MAT4F = struct.Struct('>16f')
+_MAT4D = struct.Struct('>16d')
+
+class BinWriter:
+    """
+    Big endian writer, mirroring BinWriter.cs
+    """
+    def __init__(self, stream: BinaryIO) -> None:
+        self.stream = stream
+
+    def raw(self, data: bytes) -> None:
+        self.stream.write(data)
+
+    def u8(self, value: int) -> None:
+        self.raw(_U8.pack(value))
+
+    def u16(self, value: int) -> None:
+        self.raw(_U16.pack(value))
+
+    def u32(self, value: int) -> None:
+        self.raw(_U32.pack(value))
+
+    def string(self, value: str) -> None:
+        data = value.encode('utf-8')
+        self.u32(len(data))
+        self.raw(data)
+
+    def sized(self, action: Callable[[BinWriter], None] | None = None) -> None:
+        if action is None:
+            self.u32(0)
+            return
+        size_pos = self.stream.tell()
+        self.u32(0xFFFF_FFFF) # Placeholder
+        action(self)
+        end_pos = self.stream.tell()
+        self.stream.seek(size_pos)
+        self.u32(end_pos - size_pos - 4)
+        self.stream.seek(end_pos)
+
+    def event(self, event_id: int, id: int, action: Callable[[BinWriter], None] | None = None) -> None:
+        self.u16(0xC080)
+        self.u16(event_id)
+        self.u32(id)
+        self.sized(action)
+
+    def property(self, magic: int, data: bytes = b'') -> None:
+        self.u16(magic)
+        self.raw(data)
+
+    def property_string(self, magic: int, value: str) -> None:
+        self.u16(magic)
+        self.string(value)
+
+    def property_array(self, magic: int, array: np.ndarray) -> None:
+        self.u16(magic)
+        self.sized(lambda w: w.raw(array.tobytes()))
+
+    def property_end(self) -> None:
+        self.u16(PropertyId.EndHeader)
+
+class SpaceModelWriter:
+    """
+    Writes events the way SpaceModelWriter.cs does, property for property
+    """
+    def __init__(self, stream: BinaryIO) -> None:
+        self.writer = BinWriter(stream)
+
+    def header(self, name: str, author: str, view_matrix: Mat4) -> None:
+        w = self.writer
+        w.raw(MAGIC)
+        w.u16(MAJOR_VERSION)
+        w.u16(MINOR_VERSION)
+        w.u32(0)
+
+        w.property_string(PropertyId.Name, name)
+        w.property_string(PropertyId.Author, author)
+        w.property(PropertyId.MatrixD, _MAT4D.pack(*view_matrix))
+        w.property_end()
+
+    def end(self) -> None:
+        self.writer.event(EventId.End, 0, lambda w: w.property_end())
+
+    def advance(self, delta: float) -> None:
+        def action(w: BinWriter) -> None:
+            w.property(PropertyId.Delta, _F32.pack(delta))
+            w.property_end()
+        self.writer.event(EventId.Advance, 0, action)
+
+    def light(self, id: int, matrix: Mat4, color: Vec3, cone: tuple[float, float] | None) -> None:
+        def action(w: BinWriter) -> None:
+            w.property(PropertyId.MatrixD, _MAT4D.pack(*matrix))
+            w.property(PropertyId.Color, _VEC3F.pack(*color))
+            if cone is not None:
+                w.property(PropertyId.Cone, _VEC2F.pack(*cone))
+            w.property_end()
+        self.writer.event(EventId.Light, id, action)
+
+    def remove_light(self, id: int) -> None:
+        def action(w: BinWriter) -> None:
+            w.property(PropertyId.Remove)
+            w.property_end()
+        self.writer.event(EventId.Light, id, action)
+
+    def entity(self, id: int, entity_id: int, parent: int | None = None, name: str | None = None,
+               local_matrix: Mat4 | None = None, world_matrix: Mat4 | None = None, color: tuple[int, int, int] | None = None,
+               preview: bool | None = None, show: bool | None = None, remove: bool = False, model: int | None = None) -> None:
+        def action(w: BinWriter) -> None:
+            w.property(PropertyId.Id, _I64.pack(entity_id))
+            if parent is not None:
+                w.property(PropertyId.Parent, _U32.pack(parent))
+            if name is not None:
+                w.property_string(PropertyId.Name, name)
+            if local_matrix is not None:
+                w.property(PropertyId.Matrix, _MAT4F.pack(*local_matrix))
+            if world_matrix is not None:
+                w.property(PropertyId.MatrixD, _MAT4D.pack(*world_matrix))
+            if color is not None:
+                w.property(PropertyId.ColorMask, _VEC3B.pack(*color))
+            if preview is not None:
+                w.property(PropertyId.Preview, _U8.pack(preview))
+            if show is not None:
+                w.property(PropertyId.Show, _U8.pack(show))
+            if remove:
+                w.property(PropertyId.Remove)
+
+            if model is not None:
+                w.property(PropertyId.Model, _U32.pack(model))
+            w.property_end()
+        self.writer.event(EventId.Entity, id, action)
+
+    def remove_entity(self, id: int) -> None:
+        def action(w: BinWriter) -> None:
+            w.property(PropertyId.Remove)
+            w.property_end()
+        self.writer.event(EventId.Entity, id, action)
+
+    def block(self, id: int, grid: int, position: tuple[int, int, int], translation: Vec3, orientation: int,
+              color: tuple[int, int, int], entity_id: int | None = None, name: str | None = None, model: int | None = None,
+              remove: bool = False, modifiers: list[tuple[int, int]] | None = None) -> None:
+        def action(w: BinWriter) -> None:
+            w.property(PropertyId.Parent, _U32.pack(grid))
+            w.property(PropertyId.Vector3S, _VEC3S.pack(*position))
+            w.property(PropertyId.Vector3, _VEC3F.pack(*translation))
+            w.property(PropertyId.Orientation, _U8.pack(orientation))
+            w.property(PropertyId.ColorMask, _VEC3B.pack(*color))
+            if entity_id is not None:
+                w.property(PropertyId.Id, _I64.pack(entity_id))
+            if name is not None:
+                w.property_string(PropertyId.Name, name)
+            if model is not None:
+                w.property(PropertyId.Model, _U32.pack(model))
+            if remove:
+                w.property(PropertyId.Remove)
+            if modifiers is not None:
+                w.u16(PropertyId.MaterialOverrides)
+                w.sized(lambda w2: w2.raw(b''.join(_U32.pack(src) + _U32.pack(dst) for src, dst in modifiers)))
+            w.property_end()
+        self.writer.event(EventId.Block, id, action)
+
+    def remove_block(self, id: int, position: tuple[int, int, int]) -> None:
+        def action(w: BinWriter) -> None:
+            w.property(PropertyId.Vector3S, _VEC3S.pack(*position))
+            w.property(PropertyId.Remove)
+            w.property_end()
+        self.writer.event(EventId.Block, id, action)
+
+    def model(self, id: int, name: str, vertices: np.ndarray, normals: np.ndarray, tex_coords: np.ndarray,
+              indices: np.ndarray, meshes: list[tuple[int, int, int]]) -> None:
+        def action(w: BinWriter) -> None:
+            w.property_string(PropertyId.Name, name)
+            w.property_array(PropertyId.Vertices, vertices.astype('>f4'))
+            w.property_array(PropertyId.Normals, normals.astype('>f4'))
+            w.property_array(PropertyId.TexCoords, tex_coords.astype('>f4'))
+            w.property_array(PropertyId.Indices, indices.astype('>i4'))
+            w.property_array(PropertyId.Meshes, np.array(meshes, dtype='>u4'))
+            w.property_end()
+        self.writer.event(EventId.Model, id, action)
+
+    def material(self, id: int, name: str | None, render_mode: int, textures: dict[int, int]) -> None:
+        def action(w: BinWriter) -> None:
+            if name is not None:
+                w.property_string(PropertyId.Name, name)
+            w.property(PropertyId.RenderMode, _U8.pack(render_mode))
+            for kind, texture in textures.items():
+                w.property(PropertyId.Texture, _U8.pack(kind) + _U32.pack(texture))
+            w.property_end()
+        self.writer.event(EventId.Material, id, action)
+
+    def texture(self, id: int, ty: int, name: str, path: str | None, data: bytes | None = None) -> None:
+        def action(w: BinWriter) -> None:
+            w.property(PropertyId.TextureType, _U8.pack(ty))
+            w.property_string(PropertyId.Name, name)
+            if path is not None:
+                w.property_string(PropertyId.Path, path)
+            w.property_end()
+
+            if data is not None:
+                w.raw(data)
+        self.writer.event(EventId.Texture, id, action)
+
+IDENTITY = (
+    1.0, 0.0, 0.0, 0.0,
+    0.0, 1.0, 0.0, 0.0,
+    0.0, 0.0, 1.0, 0.0,
+    0.0, 0.0, 0.0, 1.0,
+)
+
+ORIENTATIONS = (0 + 4 * 6 + 3 * 36, 4 + 1 * 6 + 3 * 36, 2 + 4 * 6 + 0 * 36, 1 + 5 * 6 + 2 * 36)
+"""
+Valid forward + up * 6 + right * 36 block orientations
+"""
+
+def rotation_y(angle: float, translation: Vec3) -> Mat4:
+    c, s = math.cos(angle), math.sin(angle)
+    return (
+        c,   0.0, -s,  0.0,
+        0.0, 1.0, 0.0, 0.0,
+        s,   0.0, c,   0.0,
+        *translation, 1.0,
+    )
+
+def gen_model(rng: np.random.Generator, triangles: int, materials: int) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, list[tuple[int, int, int]]]:
+    vertices = rng.random((triangles * 3, 3), dtype=np.float32) * 2.5
+    normals = rng.normal(size=(triangles * 3, 3)).astype(np.float32)
+    normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+    tex_coords = rng.random((triangles * 3, 2), dtype=np.float32)
+    indices = np.arange(triangles * 3, dtype=np.int32).reshape(-1, 3)
+
+    count = max(1, min(materials, triangles))
+    bounds = np.linspace(0, triangles, count + 1).astype(int)
+    mats = rng.choice(np.arange(1, materials + 1), size=count)
+    meshes = [(int(start), int(end - start), int(mat)) for start, end, mat in zip(bounds[:-1], bounds[1:], mats)]
+    return vertices, normals, tex_coords, indices, meshes
+
+def generate(path: str, textures: int = 16, materials: int = 8, models: int = 32, triangles: int = 500,
+             grids: int = 4, blocks: int = 200, subparts: int = 8, lights: int = 8, frames: int = 600, seed: int = 0) -> None:
+    """
+    Writes a capture of moving grids with blocks, rotating subparts and lights over `frames` frames
+    """
+    rng = np.random.default_rng(seed)
+    random.seed(seed)
+    next_id = 1
+    entity_ids = iter(range(1_000_000, 1_000_000_000))
+
+    with open(path, 'wb') as f:
+        w = SpaceModelWriter(f)
+        w.header('Synthetic', 'benchmark', IDENTITY)
+
+        for id in range(1, textures + 1):
+            w.texture(id, 0, f'texture_{id}', f'Textures\\Synthetic\\texture_{id}')
+        for id in range(1, materials + 1):
+            kinds = random.sample(range(4), k=random.randint(1, 4))
+            w.material(id, f'material_{id}', 1 if id % 7 == 0 else 0, {kind: random.randint(1, textures) for kind in kinds})
+        for id in range(1, models + 1):
+            w.model(id, f'model_{id}', *gen_model(rng, triangles, materials))
+
+        grid_ids = list[tuple[int, int]]()
+        subpart_ids = list[tuple[int, int, int]]()
+        grid_blocks = list[list[tuple[int, tuple[int, int, int]]]]()
+        for g in range(grids):
+            grid = next_id
+            next_id += 1
+            grid_entity = next(entity_ids)
+            grid_ids.append((grid, grid_entity))
+            w.entity(grid, grid_entity, name=f'Grid {g}', world_matrix=rotation_y(0.0, (g * 100.0, 0.0, 0.0)), show=True)
+
+            placed = list[tuple[int, tuple[int, int, int]]]()
+            for b in range(blocks):
+                id = next_id
+                next_id += 1
+                position = (b % 16, (b // 16) % 16, b // 256)
+                fat = b < subparts
+                w.block(
+                    id, grid, position, (position[0] * 2.5, position[1] * 2.5, position[2] * 2.5),
+                    random.choice(ORIENTATIONS), (random.randrange(256), 128, 128),
+                    entity_id=next(entity_ids) if fat else None,
+                    name=f'Block_{b % 5}:{position}',
+                    model=random.randint(1, models),
+                    modifiers=[(1, random.randint(1, materials))] if b % 11 == 0 else None,
+                )
+                placed.append((id, position))
+                if fat:
+                    # Subparts of fat blocks are entities parented to the block
+                    subpart = next_id
+                    next_id += 1
+                    subpart_entity = next(entity_ids)
+                    subpart_ids.append((subpart, subpart_entity, id))
+                    w.entity(subpart, subpart_entity, parent=id, name=f'Subpart {b}', local_matrix=IDENTITY, show=True, model=random.randint(1, models))
+            grid_blocks.append(placed)
+
+        light_ids = list(range(1, lights + 1))
+        for id in light_ids:
+            w.light(id, rotation_y(0.0, (id * 10.0, 5.0, 0.0)), (1.0, 0.9, 0.8), (0.5, 0.7) if id % 2 else None)
+
+        for frame in range(frames):
+            w.advance(1 / 60)
+            t = frame / 60
+            for g, (grid, grid_entity) in enumerate(grid_ids):
+                w.entity(grid, grid_entity, world_matrix=rotation_y(t * 0.1 * (g + 1), (g * 100.0 + t, 0.0, 0.0)))
+            for subpart, subpart_entity, block in subpart_ids:
+                w.entity(subpart, subpart_entity, parent=block, local_matrix=rotation_y(t * 2.0, (0.0, 0.0, 0.0)))
+            if frame % 60 == 30:
+                for id in light_ids:
+                    w.light(id, rotation_y(t, (id * 10.0, 5.0, 0.0)), (1.0, 0.9, 0.8), (0.5, 0.7) if id % 2 else None)
+            if frame % 120 == 60 and grid_blocks and grid_blocks[0]:
+                id, position = grid_blocks[0].pop()
+                w.remove_block(id, position)
+
+        w.end()
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Write a synthetic .semodel capture.')
+    parser.add_argument('output', type=str, help='Capture to write.')
+    parser.add_argument('--textures', type=int, default=16, help='Number of textures. [default: 16]')
+    parser.add_argument('--materials', type=int, default=8, help='Number of materials. [default: 8]')
+    parser.add_argument('--models', type=int, default=32, help='Number of models. [default: 32]')
+    parser.add_argument('--triangles', type=int, default=500, help='Triangles per model. [default: 500]')
+    parser.add_argument('--grids', type=int, default=4, help='Number of grids. [default: 4]')
+    parser.add_argument('--blocks', type=int, default=200, help='Blocks per grid. [default: 200]')
+    parser.add_argument('--subparts', type=int, default=8, help='Fat blocks with a rotating subpart per grid. [default: 8]')
+    parser.add_argument('--lights', type=int, default=8, help='Number of lights. [default: 8]')
+    parser.add_argument('--frames', type=int, default=600, help='Number of frames. [default: 600]')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed. [default: 0]')
+    args = parser.parse_args()
+
+    generate(args.output, args.textures, args.materials, args.models, args.triangles, args.grids, args.blocks, args.subparts, args.lights, args.frames, args.seed)
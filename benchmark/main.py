@@ -0,0 +1,161 @@
+"""
+Measures the semodel reader on synthetic or given captures.
+
+    python main.py                      # Parse a generated capture
+    python main.py capture.semodel      # Parse an existing capture
+    python main.py --build              # Also run the import against a stubbed bpy
+"""
+from __future__ import annotations
+
+import math
+import os
+import sys
+import tempfile
+import time
+
+from argparse import ArgumentParser
+from types import ModuleType
+from typing import Any, Callable
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'blender'))
+
+import semodel
+
+from generate import generate
+
+class Stub:
+    """
+    Stands in for any Blender object, accepting every attribute, call, item and operator
+    """
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+    def __getattr__(self, name: str) -> Stub:
+        return Stub()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        pass
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Stub:
+        return Stub()
+
+    def __getitem__(self, key: Any) -> Stub:
+        return Stub()
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        pass
+
+    def __delitem__(self, key: Any) -> None:
+        pass
+
+    def __contains__(self, key: Any) -> bool:
+        return False
+
+    def __iter__(self) -> Any:
+        return iter(())
+
+    def __len__(self) -> int:
+        return 0
+
+    def __float__(self) -> float:
+        return 0.0
+
+    def __enter__(self) -> Stub:
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        pass
+
+    def __mro_entries__(self, bases: tuple[Any, ...]) -> tuple[Any, ...]:
+        # Lets add-on classes derive from bpy.types as plain classes
+        return ()
+
+    def __matmul__(self, other: Any) -> Stub:
+        return Stub()
+
+    __rmatmul__ = __mul__ = __rmul__ = __add__ = __radd__ = __sub__ = __rsub__ = __truediv__ = __matmul__
+
+def stub_blender() -> None:
+    """
+    Installs stub bpy and bpy_extras modules. The block matrices need real math,
+    without the mathutils package its NumPy stand-in is used.
+    """
+    try:
+        import mathutils # noqa: F401
+    except ImportError:
+        import numpy_mathutils
+        sys.modules['mathutils'] = numpy_mathutils
+
+    for name in ('bpy', 'bpy_extras', 'bpy_extras.io_utils', 'bpy_extras.wm_utils', 'bpy_extras.wm_utils.progress_report'):
+        module = ModuleType(name)
+        module.__getattr__ = lambda attr: Stub() # type: ignore[method-assign]
+        sys.modules[name] = module
+
+def measure(name: str, repeat: int, size: int, events: int, run: Callable[[], Any]) -> None:
+    """
+    Prints the best of `repeat` runs as throughput
+    """
+    best = math.inf
+    for _ in range(max(repeat, 1)):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    print(f'{name:<16} {best:>9.3f}s {size / 2**20 / best:>10.1f} MB/s {events / best:>12.0f} events/s')
+
+def bench(path: str, repeat: int, build: bool) -> None:
+    size = os.path.getsize(path)
+    print(f'{path}: {size / 2**20:.1f} MiB')
+
+    with open(path, 'rb') as f, semodel.MappedBinReader.map(f) as r:
+        semodel.read_header(r)
+        start = r.tell()
+
+        def index() -> semodel.EventIndex:
+            r.seek(start)
+            return semodel.EventIndex.build(r)
+
+        entries = index().entries
+        print(f'{len(entries)} events')
+
+        def decode() -> None:
+            for _ in r.indexed_events(entries):
+                pass
+
+        def stream() -> None:
+            r.seek(start)
+            while True:
+                ty, _ = r.event()
+                if ty is semodel.EventTypes.End or r.tell() >= size:
+                    break
+
+        measure('Index', repeat, size, len(entries), index)
+        measure('Stream', repeat, size, len(entries), stream)
+        measure('Decode indexed', repeat, size, len(entries), decode)
+
+    if build:
+        stub_blender()
+        sys.path.insert(0, ROOT)
+        import blender # type: ignore[import-not-found]
+
+        options = blender.ImportOptions(cache_index=False)
+        measure('Build (stubbed)', repeat, size, len(entries), lambda: blender.import_semodel(path, Stub(), options))
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Benchmark the semodel reader.')
+    parser.add_argument('path', type=str, nargs='?', default=None, help='Capture to read, a synthetic one is generated when omitted.')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement, the best is reported. [default: 3]')
+    parser.add_argument('--build', action='store_true', help='Also measure import_semodel with bpy stubbed out.')
+    parser.add_argument('--frames', type=int, default=600, help='Frames of the synthetic capture. [default: 600]')
+    parser.add_argument('--grids', type=int, default=4, help='Grids of the synthetic capture. [default: 4]')
+    parser.add_argument('--blocks', type=int, default=200, help='Blocks per grid of the synthetic capture. [default: 200]')
+    parser.add_argument('--triangles', type=int, default=500, help='Triangles per model of the synthetic capture. [default: 500]')
+    args = parser.parse_args()
+
+    if args.path is not None:
+        bench(args.path, args.repeat, args.build)
+    else:
+        with tempfile.TemporaryDirectory() as dirname:
+            path = os.path.join(dirname, 'synthetic.semodel')
+            generate(path, frames=args.frames, grids=args.grids, blocks=args.blocks, triangles=args.triangles)
+            bench(path, args.repeat, args.build)
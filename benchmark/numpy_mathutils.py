@@ -0,0 +1,46 @@
+"""
+NumPy stand-in for the parts of mathutils the import uses, for --build where the mathutils package is not installed.
+Only Matrix is provided, with the operations the add-on calls on it.
+"""
+from __future__ import annotations
+
+import math
+
+import numpy as np
+
+from typing import Any, Iterator
+
+class Matrix:
+    """
+    4×4 matrix with mathutils' row layout
+    """
+    def __init__(self, rows: Any = None) -> None:
+        self.m = np.array(np.eye(4) if rows is None else rows, dtype=np.float64)
+
+    def __matmul__(self, other: Matrix) -> Matrix:
+        return Matrix(self.m @ other.m)
+
+    def __len__(self) -> int:
+        return len(self.m)
+
+    def __getitem__(self, i: int) -> tuple[float, ...]:
+        return tuple(self.m[i].tolist())
+
+    def __iter__(self) -> Iterator[tuple[float, ...]]:
+        return (tuple(row) for row in self.m.tolist())
+
+    def transpose(self) -> None:
+        self.m = self.m.T.copy()
+
+    def transposed(self) -> Matrix:
+        return Matrix(self.m.T)
+
+    def to_euler(self) -> tuple[float, float, float]:
+        """
+        XYZ euler angles of the normalized rotation part
+        """
+        r = self.m[:3, :3] / np.linalg.norm(self.m[:3, :3], axis=0)
+        cy = math.hypot(r[0, 0], r[1, 0])
+        if cy > 16 * np.finfo(np.float32).eps:
+            return (math.atan2(r[2, 1], r[2, 2]), math.atan2(-r[2, 0], cy), math.atan2(r[1, 0], r[0, 0]))
+        return (math.atan2(-r[1, 2], r[1, 1]), math.atan2(-r[2, 0], cy), 0.0)
@@ -1,594 +1,465 @@
 from __future__ import annotations
 
+import contextlib
+import hashlib
+import itertools
 import math
 import os
-import struct
+import re
+import shlex
+import subprocess
 import time
 import typing
 import bpy
+import numpy as np
 import bpy_extras as bpx
 
-from dataclasses import dataclass
-from enum import Enum
-from io import SEEK_CUR, SEEK_END
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from mathutils import Matrix
-from typing import IO, Any, Callable, Generic, Iterable, Self, TypeVar
+from typing import Any, Iterable, Sequence, TypeVar
 from bpy_extras.wm_utils.progress_report import ProgressReport,  ProgressReportSubstep
 
-Vec3i = tuple[int, int, int]
-
-Vec3i_Zero = (0, 0, 0)
-
-Vec2 = tuple[float, float]
-Vec3 = tuple[float, float, float]
-Vec4 = tuple[float, float, float, float]
-
-Vec3_Zero = (0.0, 0.0, 0.0)
-
-Mat4 = tuple[Vec4, Vec4, Vec4, Vec4]
-Mat4_Identity = (
-    (1.0, 0.0, 0.0, 0.0),
-    (0.0, 1.0, 0.0, 0.0),
-    (0.0, 0.0, 1.0, 0.0),
-    (0.0, 0.0, 0.0, 1.0)
+from .semodel import (
+    AdvanceEvent, BinReader, BlockEvent, BlockOrientation, ColorMask_Default, EntityEvent, Event, EventIndex,
+    EventType, EventTypes, LightEvent, MappedBinReader, Mat4, Mat4_Identity, MaterialEvent,
+    MeshInfo, ModelEvent, ObjectEvent, PropertyTypes, RenderMode, TextureEvent, TextureKind, Vec3, Vec4,
+    Profiler, decode_entries, filter_entries, weld_vertices, find_empty_objects, fold_entries, read_header, select_objects,
 )
 
-Color_Default = (1.0, 1.0, 1.0)
-ColorMask_Default = (0.0, 0.0, 0.0)
-
-_T = TypeVar('_T')
-_TE = TypeVar('_TE', bound='Event')
-_D = TypeVar('_D')
+_TE = TypeVar('_TE', bound=Event)
 
 NODE_SETEX = 'nSEr SETex'
+NODE_INSTANCES = 'nSEr Instances'
+NODE_SURFACE = 'nSEr Surface'
+PROXY_SUFFIX = '_proxy'
+PROXY_PROPERTY = 'nser_proxy'
+FULL_PROPERTY = 'nser_full'
+VARIANT_PROPERTY = 'nser_variant'
+"""
+Custom property holding the capture independent key of a material variant
+"""
+KEYFRAME_CONSTANT = 0
+KEYFRAME_LINEAR = 1
+KEYFRAME_BEZIER = 2
+"""
+Values of the Keyframe.interpolation enum, as written by foreach_set
+"""
 FPS = 60
 GLASS_HACK = False
 """
 Enable this if the glass refracts too much
 """
 
-class PropertyType(Generic[_T]):
-    def __init__(self, magic: int, name: str, read: Callable[[BinReader], _T]) -> None:
-        self.magic = magic
-        self.name = name
-        self.read = read
-
-    def __str__(self) -> str:
-        return f'PropertyType({self.name})'
-
-    def __repr__(self) -> str:
-        return f'PropertyType({self.magic:04X}, {self.name})'
-
-class EventType(Generic[_TE]):
-    def __init__(self, magic: int, name: str, read: Callable[[int, Properties, BinReader], _TE]) -> None:
-        self.magic = magic
-        self.name = name
-        self.read = read
-
-    def __str__(self) -> str:
-        return f'EventType({self.name})'
-    
-    def __repr__(self) -> str:
-        return f'EventType({self.magic:04X}, {self.name})'
-
-class TextureType(Enum):
-    Auto = 0x00
-    PNG = 0x01
-    DDS = 0x02
-
-class TextureKind(Enum):
-    ColorMetal  = 0x00
-    NormalGloss = 0x01
-    AddMaps     = 0x02
-    AlphaMask   = 0x03
-
-class RenderMode(Enum):
-    Normal = 0x00
-    Glass = 0x01
-
-class Direction(Enum):
-    Forward  = 0
-    Backward = 1
-    Left     = 2
-    Right    = 3
-    Up       = 4
-    Down     = 5
-
-    def vector(self) -> Vec3i:
-        match self:
-            case Direction.Forward:  return ( 0,  0, -1)
-            case Direction.Backward: return ( 0,  0,  1)
-            case Direction.Left:     return (-1,  0,  0)
-            case Direction.Right:    return ( 1,  0,  0)
-            case Direction.Up:       return ( 0,  1,  0)
-            case Direction.Down:     return ( 0, -1,  0)
-
-@dataclass
-class BlockOrientation:
-    forward: Direction
-    up:      Direction
-    right:   Direction
-
-    @classmethod
-    def from_u8(cls, value: int) -> BlockOrientation:
-        return BlockOrientation(
-            Direction(value % 6),
-            Direction((value // 6) % 6),
-            Direction((value // 36) % 6),
-        )
-
-@dataclass
-class MeshInfo:
-    tri_start: int
-    tri_count: int
-    mat_id:    int
+VariantKey = tuple[RenderMode, int | None, int | None, int | None, int | None]
+PrototypeKey = tuple[int, tuple[tuple[int, int], ...], Vec3]
 
 @dataclass
-class MaterialOverride:
-    src_id: int
-    dst_id: int
-
-def unpack_color_mask(mask: Vec3i) -> Vec3:
-    hb, sb, vb = mask
-    return (
-        hb / 255.0,
-        (sb / 127.5) - 1.0,
-        (vb / 127.5) - 1.0
-    )
+class ImportOptions:
+    instance_blocks: bool = False
+    """
+    Draw blocks without an entity of their own as instances of shared meshes
+    """
+    weld_vertices: bool = False
+    """
+    Merge the vertices of a model with identical position, UV and normal before building its mesh
+    """
+    fps: int = FPS
+    """
+    Frame rate the captured time is sampled at
+    """
+    simplify_tolerance: float = 0.0
+    """
+    Drop transform keys that linear interpolation reproduces within this tolerance, 0 keeps all keys
+    """
+    cache_index: bool = True
+    """
+    Keep the event index next to the capture as `<file>.idx`
+    """
+    start_time: float = 0.0
+    """
+    Capture time in seconds the import starts at, earlier state is folded into the initial transforms
+    """
+    end_time: float = 0.0
+    """
+    Capture time in seconds the import stops at, 0 imports to the end
+    """
+    filter_ids: set[int] = field(default_factory=set)
+    """
+    Only import root entities with these capture or game ids, and everything parented to them
+    """
+    filter_name: str = ''
+    """
+    Only import root entities whose name matches this glob
+    """
+    filter_radius: float = 0.0
+    """
+    Only import root entities and lights within this distance of the anchor, 0 disables the check
+    """
+
+    reuse_materials: bool = True
+    """
+    Use material variants already in the .blend instead of building them again
+    """
+    material_library: str = ''
+    """
+    .blend file to link missing material variants from
+    """
+    proxy_textures: bool = False
+    """
+    Draw textures from their low resolution proxies in `_proxy` sibling directories, Render > Full Resolution semodel Textures swaps in the full resolution ones
+    """
+    texture_converter: str = ''
+    """
+    Command line of the texture converter, when set the DDS textures of the capture are converted to PNG next to them during the import
+    """
+    profile: bool = False
+    """
+    Report time, bytes and peak memory per event type and phase to the console and `<file>.profile.json`
+    """
+
+    def filtered(self) -> bool:
+        return bool(self.filter_ids or self.filter_name or self.filter_radius > 0.0)
+
+@dataclass(slots=True)
+class Model:
+    """
+    What the import keeps of a model once its mesh exists, the geometry itself only lives in Blender
+    """
+    mesh:   bpy.types.Mesh
+    meshes: Sequence[MeshInfo]
+
+class InstanceCloud:
+    """
+    Blocks of a single grid, drawn as instances on the points of one mesh
+    """
+    def __init__(self, parent: int) -> None:
+        self.parent     = parent
+        self.positions  = list[Vec3]()
+        self.rotations  = list[Vec3]()
+        self.prototypes = list[int]()
+        self.shown      = list[float]()
+        self.hidden     = list[float]()
+
+    def add(self, position: Vec3, rotation: Vec3, prototype: int, frame: int) -> int:
+        self.positions.append(position)
+        self.rotations.append(rotation)
+        self.prototypes.append(prototype)
+        self.shown.append(frame)
+        self.hidden.append(math.inf)
+        return len(self.positions) - 1
+
+KeyframeTrack = dict[float, tuple[float, ...]]
+
+def simplify_keys(frames: np.ndarray, values: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Returns a mask of the keys to keep, so that linear interpolation between kept keys
+    stays within `tolerance` of every dropped key (Ramer-Douglas-Peucker along the time axis)
+    """
+    count = len(frames)
+    keep = np.zeros(count, dtype=bool)
+    keep[0] = keep[-1] = True
+
+    stack = [(0, count - 1)]
+    while stack:
+        a, b = stack.pop()
+        if b - a < 2:
+            continue
+        t = (frames[a + 1:b] - frames[a]) / (frames[b] - frames[a])
+        interp = values[a] + t[:, None] * (values[b] - values[a])
+        error = np.abs(values[a + 1:b] - interp).max(axis=1)
+        i = int(error.argmax())
+        if error[i] > tolerance:
+            split = a + 1 + i
+            keep[split] = True
+            stack.append((a, split))
+            stack.append((split, b))
+
+    return keep
+
+YZ_SWAP = [0, 2, 1, 3]
+
+def object_bases(matrices: np.ndarray, world: np.ndarray, view: np.ndarray) -> np.ndarray:
+    """
+    Converts N×4×4 captured matrices (row vectors, Y up) to Blender basis matrices,
+    local ones with Y and Z swapped on both sides and world ones through `view`
+    """
+    bases = np.empty_like(matrices)
+    local = ~world
+    bases[local] = matrices[local][:, YZ_SWAP][:, :, YZ_SWAP].transpose(0, 2, 1)
+    bases[world] = view @ matrices[world].transpose(0, 2, 1)[:, :, YZ_SWAP]
+    return bases
+
+def decompose_matrices(bases: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Splits N×4×4 matrices into locations, quaternions and scales, like `Matrix.decompose` does for each one.
+    Quaternions are (w, x, y, z) with w >= 0, negative matrices get a negative scale.
+    """
+    location = bases[:, :3, 3]
+    scale = np.linalg.norm(bases[:, :3, :3], axis=1)
+    m = bases[:, :3, :3] / np.where(scale == 0.0, 1.0, scale)[:, None, :]
+    negative = np.linalg.det(m) < 0.0
+    m[negative] *= -1.0
+    scale[negative] *= -1.0
+
+    # Each row is computed from the largest of |w|, |x|, |y| and |z|, which keeps the division well away from zero
+    r00, r01, r02 = m[:, 0, 0], m[:, 0, 1], m[:, 0, 2]
+    r10, r11, r12 = m[:, 1, 0], m[:, 1, 1], m[:, 1, 2]
+    r20, r21, r22 = m[:, 2, 0], m[:, 2, 1], m[:, 2, 2]
+    traces = np.stack((1.0 + r00 + r11 + r22, 1.0 + r00 - r11 - r22, 1.0 - r00 + r11 - r22, 1.0 - r00 - r11 + r22), axis=1)
+    s = 2.0 * np.sqrt(np.maximum(traces, 1e-12))
+    sw, sx, sy, sz = s[:, 0], s[:, 1], s[:, 2], s[:, 3]
+    candidates = np.stack((
+        np.stack((sw / 4.0, (r21 - r12) / sw, (r02 - r20) / sw, (r10 - r01) / sw), axis=1),
+        np.stack(((r21 - r12) / sx, sx / 4.0, (r01 + r10) / sx, (r02 + r20) / sx), axis=1),
+        np.stack(((r02 - r20) / sy, (r01 + r10) / sy, sy / 4.0, (r12 + r21) / sy), axis=1),
+        np.stack(((r10 - r01) / sz, (r02 + r20) / sz, (r12 + r21) / sz, sz / 4.0), axis=1),
+    ), axis=1)
+    best = traces.argmax(axis=1)
+    rotation = candidates[np.arange(len(best)), best]
+    rotation /= np.linalg.norm(rotation, axis=1)[:, None]
+    rotation[rotation[:, 0] < 0.0] *= -1.0
+
+    return location, rotation, scale
+
+def step_keys(frames: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Keys for values that change at `frames`, each change is held from the frame before.
+    Returns the sorted key frames and, for each, the index of its value, 0 being the value before the first change.
+    A later key on the same frame replaces an earlier one, a held key never replaces another.
+    """
+    count = len(frames)
+    key_frames = np.empty(count * 2, dtype=np.float64)
+    key_frames[0::2] = frames - 1
+    key_frames[1::2] = frames
+    values = np.repeat(np.arange(count + 1), 2)[1:-1]
+    order = np.arange(count * 2)
+    hold = order % 2 == 0
+    # The winner on each frame ranks highest: the last change, else the first hold
+    rank = np.where(hold, -order, order + count * 2)
+    sort = np.lexsort((rank, key_frames))
+    key_frames = key_frames[sort]
+    last = np.append(key_frames[1:] != key_frames[:-1], True)
+    return key_frames[last], values[sort][last]
+
+class TransformSamples:
+    """
+    Captured matrices of one object, converted to its transform in one batch when the keyframes are written
+    """
+    def __init__(self, matrix: Mat4, world: bool) -> None:
+        self.frames   = list[float]()
+        self.matrices = [matrix]
+        self.world    = [world]
+
+    def transforms(self, view: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        bases = object_bases(np.array(self.matrices, dtype=np.float64), np.array(self.world, dtype=bool), view)
+        return decompose_matrices(bases)
+
+SLOTTED_ACTIONS = 'fcurve_ensure_for_datablock' in bpy.types.Action.bl_rna.functions
+"""
+Blender 4.4+ keeps fcurves in the channelbags of action slots, Action.fcurves is gone in 5.0
+"""
 
-class PropertyTypes:
-    EndHeader    = PropertyType[None]                   (0x0000, 'EndHeader',    lambda r: None)
-    Id           = PropertyType[int]                    (0x0108, 'Id',           lambda r: r.i64())
-    Name         = PropertyType[str]                    (0x02FF, 'Name',         lambda r: r.string())
-    Author       = PropertyType[str]                    (0x03FF, 'Author',       lambda r: r.string())
-    Path         = PropertyType[str]                    (0x04FF, 'Path',         lambda r: r.string())
-    Matrix       = PropertyType[Mat4]                   (0x0540, 'Matrix',       lambda r: r.mat4f())
-    MatrixD      = PropertyType[Mat4]                   (0x0580, 'MatrixD',      lambda r: r.mat4d())
-    TextureType  = PropertyType[TextureType]            (0x0601, 'TextureType',  lambda r: TextureType(r.u8()))
-    Vertices     = PropertyType[list[Vec3]]             (0x07FF, 'Vertices',     lambda r: r.sized().all(r.vec3f))
-    Normals      = PropertyType[list[Vec3]]             (0x08FF, 'Normals',      lambda r: r.sized().all(r.vec3f))
-    TexCoords    = PropertyType[list[Vec2]]             (0x09FF, 'TexCoords',    lambda r: r.sized().all(r.vec2f))
-    Indices      = PropertyType[list[Vec3i]]            (0x0AFF, 'Indices',      lambda r: r.sized().all(r.vec3i))
-    Meshes       = PropertyType[list[MeshInfo]]         (0x0BFF, 'Meshes',       lambda r: r.sized().all(r.mesh))
-    MaterialMods = PropertyType[list[MaterialOverride]] (0x0CFF, 'MaterialMods', lambda r: r.sized().all(r.mat_override))
-    Model        = PropertyType[int]                    (0x0D04, 'Model',        lambda r: r.u32())
-    Color        = PropertyType[Vec3]                   (0x0E0C, 'Color',        lambda r: r.vec3f())
-    ColorMask    = PropertyType[Vec3]                   (0x0E03, 'ColorMask',    lambda r: unpack_color_mask(r.vec3b()))
-    Delta        = PropertyType[float]                  (0x0F04, 'Delta',        lambda r: r.f32())
-    Cone         = PropertyType[Vec2]                   (0x1008, 'Cone',         lambda r: r.vec2f())
-    Scale        = PropertyType[float]                  (0x1104, 'Scale',        lambda r: r.f32())
-    Remove       = PropertyType[None]                   (0x1200, 'Remove',       lambda r: None)
-    Preview      = PropertyType[bool]                   (0x1301, 'Preview',      lambda r: r.bool())
-    Parent       = PropertyType[int]                    (0x1404, 'Parent',       lambda r: r.u32())
-    Show         = PropertyType[bool]                   (0x1501, 'Show',         lambda r: r.bool())
-    RenderMode   = PropertyType[RenderMode]             (0x1601, 'RenderMode',   lambda r: RenderMode(r.u8()))
-    Texture      = PropertyType[tuple[TextureKind, int]](0x1705, 'Texture',      lambda r: (TextureKind(r.u8()), r.u32()))
-    Vector3      = PropertyType[Vec3]                   (0x180C, 'Vector3',      lambda r: r.vec3f())
-    Vector3S     = PropertyType[Vec3i]                  (0x1806, 'Vector3S',     lambda r: r.vec3s())
-    Orientation  = PropertyType[BlockOrientation]       (0x1901, 'Orientation',  lambda r: BlockOrientation.from_u8(r.u8()))
-
-PropertyTypeMap = dict[int, PropertyType[Any]]()
-for attr in dir(PropertyTypes):
-    if not attr.startswith('_'):
-        prop = getattr(PropertyTypes, attr)
-        if isinstance(prop, PropertyType):
-            PropertyTypeMap[prop.magic] = prop
-
-class Properties:
-    def __init__(self) -> None:
-        self.data = dict[PropertyType[Any], list[Any]]()
-
-    def add(self, key: PropertyType[Any], value: Any) -> None:
-        if key in self.data:
-            self.data[key].append(value)
+class KeyframeBuffer:
+    """
+    Keyframes collected during the import and written to fcurves in one go by `flush`
+    """
+    def __init__(self, view: np.ndarray, tolerance: float = 0.0) -> None:
+        self.view = view
+        self.tolerance = tolerance
+        self.recording = True
+        self.objects = dict[bpy.types.Object, dict[str, KeyframeTrack]]()
+        self.transforms = dict[bpy.types.Object, TransformSamples]()
+
+    def __len__(self) -> int:
+        return len(self.objects.keys() | self.transforms.keys())
+
+    def insert(self, obj: bpy.types.Object, data_path: str, frame: float, value: tuple[float, ...], hold: bool = False) -> None:
+        """
+        Like keyframe_insert, a later key on the same frame replaces the earlier one.
+        A `hold` key, which keeps the previous value up to a change, never replaces a key.
+        """
+        if not self.recording:
+            return
+        tracks = self.objects.get(obj)
+        if tracks is None:
+            tracks = self.objects[obj] = {}
+        track = tracks.get(data_path)
+        if track is None:
+            track = tracks[data_path] = {}
+        if hold:
+            track.setdefault(frame, value)
         else:
-            self.data[key] = [value]
-
-    def get(self, key: PropertyType[_T], default: _D = None) -> _T | _D:
-        return self.data.get(key, [default])[0]
-
-    def pop(self, key: PropertyType[_T], default: _D = None) -> _T | _D:
-        return self.data.pop(key, [default])[0]
-
-    def get_all(self, key: PropertyType[_T]) -> list[_T]:
-        return self.data.get(key, [])
-
-    def pop_all(self, key: PropertyType[_T]) -> list[_T]:
-        return self.data.pop(key, [])
-
-    def __contains__(self, key: PropertyType[Any]) -> bool:
-        return key in self.data
-    
-    def __str__(self) -> str:
-        return str(self.data)
-    
-    def __repr__(self) -> str:
-        return f'Properties({self.data!r})'
-
-@dataclass
-class Event:
-    id:    int
-    props: Properties
-
-@dataclass
-class BlockEvent(Event):
-    parent:      int
-    position:    Vec3i
-    translation: Vec3
-    orientation: BlockOrientation
-    color:       Vec3
-    entity:      int | None
-    name:        str | None
-    model:       int | None
-    overrides:   list[MaterialOverride]
-    remove:      bool
-
-    @classmethod
-    def read(cls, id: int, props: Properties, r: BinReader) -> Self:
-        return cls(
-            id,
-            props,
-
-            props.pop(PropertyTypes.Parent, -1),
-            props.pop(PropertyTypes.Vector3S, Vec3i_Zero),
-            props.pop(PropertyTypes.Vector3, Vec3_Zero),
-            props.pop(PropertyTypes.Orientation, BlockOrientation.from_u8(0)),
-            props.pop(PropertyTypes.ColorMask, ColorMask_Default),
-            props.pop(PropertyTypes.Id, None),
-            props.pop(PropertyTypes.Name, None),
-            props.pop(PropertyTypes.Model, None),
-            props.pop(PropertyTypes.MaterialMods, []),
-            PropertyTypes.Remove in props,
-        )
-
-@dataclass
-class EndEvent(Event):
-    @classmethod
-    def read(cls, id: int, props: Properties, r: BinReader) -> Self:
-        return cls(id, props)
-
-@dataclass
-class AdvanceEvent(Event):
-    delta: float
-
-    @classmethod
-    def read(cls, id: int, props: Properties, r: BinReader) -> Self:
-        return cls(
-            id,
-            props,
-
-            props.pop(PropertyTypes.Delta, 0.0)
-        )
-
-@dataclass
-class ObjectEvent(Event):
-    lmatrix: Mat4 | None
-    wmatrix: Mat4 | None
-    parent:  int | None
-    show:    bool | None
-    remove:  bool
-
-@dataclass
-class LightEvent(ObjectEvent):
-    color:  Vec3
-    cone:   Vec2 | None
-
-    @classmethod
-    def read(cls, id: int, props: Properties, r: BinReader) -> Self:
-        return cls(
-            id,
-            props,
-            
-            props.pop(PropertyTypes.Matrix, None),
-            props.pop(PropertyTypes.MatrixD, None),
-            props.pop(PropertyTypes.Parent, None),
-            props.get(PropertyTypes.Show, None),
-            PropertyTypes.Remove in props,
-
-            props.pop(PropertyTypes.Color, Color_Default),
-            props.pop(PropertyTypes.Cone, None),
-        )
-
-@dataclass
-class EntityEvent(ObjectEvent):
-    entity:  int
-    name:    str | None
-    model:   int | None
-    color:   Vec3 | None
-    preview: bool | None
-
-    @classmethod
-    def read(cls, id: int, props: Properties, r: BinReader) -> Self:
-        return cls(
-            id,
-            props,
-
-            props.pop(PropertyTypes.Matrix, None),
-            props.pop(PropertyTypes.MatrixD, None),
-            props.pop(PropertyTypes.Parent, None),
-            props.get(PropertyTypes.Show, None),
-            PropertyTypes.Remove in props,
-
-            props.pop(PropertyTypes.Id, -1),
-            props.pop(PropertyTypes.Name, None),
-            props.pop(PropertyTypes.Model, None),
-            props.get(PropertyTypes.ColorMask, None),
-            props.get(PropertyTypes.Preview, None),
-        )
-
-@dataclass
-class ModelEvent(Event):
-    name:       str
-    vertices:   list[Vec3]
-    normals:    list[Vec3]
-    tex_coords: list[Vec2]
-    indices:    list[Vec3i]
-    meshes:     list[MeshInfo]
-
-    @classmethod
-    def read(cls, id: int, props: Properties, r: BinReader) -> Self:
-        return cls(
-            id,
-            props,
-
-            props.pop(PropertyTypes.Name, 'unknown'),
-            props.pop(PropertyTypes.Vertices, []),
-            props.pop(PropertyTypes.Normals, []),
-            props.pop(PropertyTypes.TexCoords, []),
-            props.pop(PropertyTypes.Indices, []),
-            props.pop(PropertyTypes.Meshes, []),
-        )
-
-@dataclass
-class MaterialEvent(Event):
-    name:         str
-    render_mode:  RenderMode
-    textures:     dict[TextureKind, int]
-
-    @classmethod
-    def read(cls, id: int, props: Properties, r: BinReader) -> Self:
-        return cls(
-            id,
-            props,
-
-            props.pop(PropertyTypes.Name, 'unknown'),
-            props.pop(PropertyTypes.RenderMode, RenderMode.Normal),
-            dict(props.pop_all(PropertyTypes.Texture)),
-        )
-    
-    def merge(self, other: MaterialEvent) -> MaterialEvent:
-        return MaterialEvent(
-            self.id,
-            self.props,
-            f'{other.name}+{self.name}',
-            self.render_mode,
-            self.textures | other.textures
-        )
-
-@dataclass
-class TextureEvent(Event):
-    ty:   TextureType
-    name: str
-    path: str | None
-    data: bytes | None
-
-    @classmethod
-    def read(cls, id: int, props: Properties, r: BinReader) -> Self:
-        data = r.rest()
-        return cls(
-            id,
-            props,
-
-            props.pop(PropertyTypes.TextureType, TextureType.Auto),
-            props.pop(PropertyTypes.Name, 'unknown'),
-            props.pop(PropertyTypes.Path, None),
-            data if len(data) > 0 else None,
-        )
-
-class EventTypes:
-    End      = EventType[EndEvent]     (0x0000, 'End',      EndEvent.read)
-    Advance  = EventType[AdvanceEvent] (0x0010, 'Advance',  AdvanceEvent.read)
-    Texture  = EventType[TextureEvent] (0x0020, 'Texture',  TextureEvent.read)
-    Material = EventType[MaterialEvent](0x0030, 'Material', MaterialEvent.read)
-    Model    = EventType[ModelEvent]   (0x0040, 'Model',    ModelEvent.read)
-    Entity   = EventType[EntityEvent]  (0x0050, 'Entity',   EntityEvent.read)
-    Block    = EventType[BlockEvent]   (0x0051, 'Block',    BlockEvent.read)
-    Light    = EventType[LightEvent]   (0x0060, 'Light',    LightEvent.read)
-
-EventTypeMap = dict[int, EventType[Any]]()
-for attr in dir(EventTypes):
-    if not attr.startswith('_'):
-        event_type = getattr(EventTypes, attr)
-        if isinstance(event_type, EventType):
-            EventTypeMap[event_type.magic] = event_type
-
-class BinReader:
-    def __init__(self, io: IO[bytes], end: int | None = None) -> None:
-        self.io = io
-        self.end = end
-
-    def tell(self) -> int:
-        return self.io.tell()
-    
-    def length(self) -> int:
-        pos = self.io.tell()
-        self.io.seek(0, SEEK_END)
-        length = self.io.tell()
-        self.io.seek(pos)
-        return length
-
-    def raw(self, n: int) -> bytes:
-        buf = bytearray()
-        if self.end is not None and self.io.tell() + n > self.end:
-            raise ValueError('Attempting to read beyond end of constrained reader')
-        while len(buf) < n:
-            data = self.io.read(n - len(buf))
-            if len(data) == 0:
-                raise EOFError('Unexpected end of data')
-            buf.extend(data)
-        return buf
-    
-    def u(self, n: int) -> int:
-        return int.from_bytes(self.raw(n), 'big')
-
-    def u8(self) -> int: return self.u(1)
-    def u16(self) -> int: return self.u(2)
-    def u32(self) -> int: return self.u(4)
-    def u64(self) -> int: return self.u(8)
-
-    def i(self, n: int) -> int:
-        return int.from_bytes(self.raw(n), 'big', signed=True)
-
-    def i8(self) -> int: return self.i(1)
-    def i16(self) -> int: return self.i(2)
-    def i32(self) -> int: return self.i(4)
-    def i64(self) -> int: return self.i(8)
-    
-    def f32(self) -> float: return struct.unpack('>f', self.raw(4))[0]
-    def f64(self) -> float: return struct.unpack('>d', self.raw(8))[0]
-
-    def bool(self) -> bool: return self.u8() != 0
-
-    def vec3b(self) -> Vec3i:
-        return struct.unpack('>BBB', self.raw(3))
-
-    def vec3s(self) -> Vec3i:
-        return struct.unpack('>hhh', self.raw(6))
-
-    def vec3i(self) -> Vec3i:
-        return struct.unpack('>iii', self.raw(12))
-
-    def vec2f(self) -> Vec2:
-        return struct.unpack('>ff', self.raw(8))
-    def vec3f(self) -> Vec3:
-        return struct.unpack('>fff', self.raw(12))
-    def vec4f(self) -> Vec4:
-        return struct.unpack('>ffff', self.raw(16))
-
-    def vec4d(self) -> Vec4:
-        return struct.unpack('>dddd', self.raw(32))
-
-    def mat4f(self) -> tuple[Vec4, Vec4, Vec4, Vec4]:
-        return (self.vec4f(), self.vec4f(), self.vec4f(), self.vec4f())
-
-    def mat4d(self) -> tuple[Vec4, Vec4, Vec4, Vec4]:
-        return (self.vec4d(), self.vec4d(), self.vec4d(), self.vec4d())
-    
-    def string(self) -> str:
-        return self.io.read(self.u32()).decode('utf-8')
-
-    def mesh(self) -> MeshInfo:
-        return MeshInfo(self.u32(), self.u32(), self.u32())
-
-    def mat_override(self) -> MaterialOverride:
-        return MaterialOverride(self.u32(), self.u32())
-    
-    def restrict(self, end: int) -> BinReader:
-        if self.end is not None and end > self.end:
-            raise ValueError('Cannot restrict to a larger end')
-        return BinReader(self.io, end)
-    
-    def sized(self, size: int | None = None) -> BinReader:
-        if size is None:
-            size = self.u32()
-        return self.restrict(self.io.tell() + size)
-
-    def all(self, f: Callable[[], _T]) -> list[_T]:
-        if self.end is None:
-            raise ValueError('Cannot read all items without end')
-        items = []
-        while self.io.tell() < self.end:
-            items.append(f())
-        return items
-    
-    def rest(self) -> bytes:
-        if self.end is None:
-            raise ValueError('Cannot read rest without end')
-        return self.io.read(self.end - self.io.tell())
-
-    def property(self) -> tuple[PropertyType[Any] | None, Any]:
-        val = self.u16()
-        try:
-            ty = PropertyTypeMap[val]
-        except KeyError:
-            size = val & 0x00FF
-            if size == 0xFF: # Dynamic size
-                size = self.u32()
-            self.io.seek(size, SEEK_CUR)
-            print(f'Skipping unknown property type {val:>04X}')
-            return None, None
-        
-        return ty, ty.read(self)
-
-    def properties(self) -> Properties:
-        props = Properties()
-        while True:
-            ty, prop = self.property()
-            if ty is None:
-                continue
-            if ty is PropertyTypes.EndHeader:
-                break
-            props.add(ty, prop)
-        return props
-    
-    def event(self) -> tuple[EventType[Any] | None, Event | None]:
-        if self.u16() != 0xC080:
-            raise ValueError('Invalid magic number for event header')
-        val = self.u16()
-        try:
-            ty = EventTypeMap[val]
-        except KeyError:
-            size = self.u32()
-            self.io.seek(size, SEEK_CUR)
-            print(f'Skipping unknown event type {val}')
-            return None, None
-
-        id = self.u32()
-        
-        size = self.u32()
-        pos = self.io.tell()
-        end = pos + size
-        r = self.restrict(end)
-
-        # print(f'Start ty={ty} size={size} pos={pos} end={end}')
-
-        props = r.properties()
-
-        event = ty.read(id, props, r)
-
-        # print(f'End pos={self.io.tell()} end={end}')
-
-        self.io.seek(end)
-        return ty, event
-    
-    def events(self) -> Iterable[Event]:
-        while True:
-            ty, event = self.event()
-            if ty is EventTypes.End:
-                break
-            if event is not None:
-                yield event
-
-VariantKey = tuple[RenderMode, int | None, int | None, int | None, int | None]
+            track[frame] = value
+
+    def insert_visibility(self, obj: bpy.types.Object, frame: float, hold: bool = False) -> None:
+        self.insert(obj, 'hide_render', frame, (float(obj.hide_render),), hold)
+
+    def init_transform(self, obj: bpy.types.Object, matrix: Mat4, world: bool) -> None:
+        """
+        Sets the captured matrix of a new object, its transform is only computed when flushing
+        """
+        self.transforms[obj] = TransformSamples(matrix, world)
+
+    def insert_transform(self, obj: bpy.types.Object, frame: float, matrix: Mat4, world: bool) -> None:
+        """
+        Changes the captured matrix of `obj` at `frame`, keyed like the other keyframes with a hold on the frame before.
+        When not recording the change replaces the initial transform.
+        """
+        samples = self.transforms[obj]
+        if self.recording:
+            samples.frames.append(frame)
+            samples.matrices.append(matrix)
+            samples.world.append(world)
+        else:
+            samples.matrices[-1] = matrix
+            samples.world[-1] = world
+
+    def discard(self, obj: bpy.types.Object) -> None:
+        self.objects.pop(obj, None)
+        self.transforms.pop(obj, None)
+
+    def flush_transform(self, obj: bpy.types.Object, action: bpy.types.Action | None) -> bpy.types.Action | None:
+        """
+        Sets the final transform of `obj` and writes its transform keyframes, creating `action` when there are any
+        """
+        samples = self.transforms.pop(obj)
+        location, rotation, scale = samples.transforms(self.view)
+        obj.location = location[-1]
+        obj.rotation_quaternion = rotation[-1]
+        obj.scale = scale[-1]
+
+        if samples.frames:
+            frames, values = step_keys(np.array(samples.frames, dtype=np.float64))
+            action = self.ensure_action(obj, action)
+            self.write_track(obj, action, 'location', frames, location[values])
+            self.write_track(obj, action, 'rotation_quaternion', frames, rotation[values])
+            self.write_track(obj, action, 'scale', frames, scale[values])
+
+        return action
+
+    def ensure_action(self, obj: bpy.types.Object, action: bpy.types.Action | None) -> bpy.types.Action:
+        if action is None:
+            action = bpy.data.actions.new(f'{obj.name}Action')
+            if SLOTTED_ACTIONS:
+                # fcurve_ensure_for_datablock needs the action assigned, it then creates and assigns the object's slot
+                obj.animation_data_create().action = action
+        return action
+
+    def write_track(self, obj: bpy.types.Object, action: bpy.types.Action, data_path: str, frames: np.ndarray, values: np.ndarray) -> None:
+        count = len(frames)
+
+        if data_path == 'hide_render':
+            group = ''
+            interpolation = KEYFRAME_CONSTANT
+        elif self.tolerance > 0.0:
+            # Dropped keys are only reproduced by straight lines between the kept ones
+            group = 'Object Transforms'
+            interpolation = KEYFRAME_LINEAR
+            keep = simplify_keys(frames.astype(np.float64), values.astype(np.float64), self.tolerance)
+            frames = frames[keep]
+            values = values[keep]
+            count = len(frames)
+        else:
+            group = 'Object Transforms'
+            interpolation = KEYFRAME_BEZIER
+
+        co = np.empty((count, 2), dtype=np.float32)
+        co[:, 0] = frames
+        for index in range(values.shape[1]):
+            co[:, 1] = values[:, index]
+            if SLOTTED_ACTIONS:
+                fcurve = action.fcurve_ensure_for_datablock(obj, data_path, index=index, group_name=group)
+            else:
+                fcurve = action.fcurves.new(data_path, index=index, action_group=group)
+            fcurve.keyframe_points.add(count)
+            fcurve.keyframe_points.foreach_set('co', co.ravel())
+            fcurve.keyframe_points.foreach_set('interpolation', np.full(count, interpolation, dtype=np.int32))
+            fcurve.update()
+
+    def flush_object(self, obj: bpy.types.Object) -> None:
+        action = None
+        if obj in self.transforms:
+            action = self.flush_transform(obj, action)
+
+        tracks = self.objects.pop(obj, {})
+        for data_path, track in tracks.items():
+            action = self.ensure_action(obj, action)
+            keys = sorted(track)
+            frames = np.array(keys, dtype=np.float32)
+            values = np.array([track[frame] for frame in keys], dtype=np.float32)
+            self.write_track(obj, action, data_path, frames, values)
+
+        if action is not None and not SLOTTED_ACTIONS:
+            # Assigned after the fcurves exist so the action's only slot gets picked for the object
+            animation_data = obj.animation_data_create()
+            animation_data.action = action
+
+    def flush(self) -> Iterable[None]:
+        """
+        Writes the transforms and keyframes of all objects, yielding once per object for progress reporting
+        """
+        for obj in list(self.objects.keys() | self.transforms.keys()):
+            self.flush_object(obj)
+            yield
 
 class Data:
-    def __init__(self, collection: bpy.types.Collection, setex: bpy.types.ShaderNodeTree, view_matrix: Matrix) -> None:
+    def __init__(self, collection: bpy.types.Collection, setex: bpy.types.ShaderNodeTree, view_matrix: Matrix, options: ImportOptions, reader: BinReader, dirname: str) -> None:
         self.setex = setex
         self.view_matrix = view_matrix
+        self.options = options
+        self.reader = reader
+        self.dirname = dirname
+        self.definitions = dict[tuple[int, int], int]()
+        """
+        Offsets of the texture, material and model events, loaded on first use
+        """
+        self.skipped = set[int]()
+        """
+        Entities and blocks that would end up empty, they are never created
+        """
         self.textures  = dict[int, bpy.types.Image]()
+        self.texture_paths = dict[int, str]()
+        """
+        Resolved files of the textures, filled up front by `resolve_textures`
+        """
+        self.proxy_paths = dict[int, str]()
+        self.converting  = dict[str, str]()
+        """
+        PNG files the texture converter is writing, with the DDS files they are converted from
+        """
+        self.converted   = list[tuple[bpy.types.Image, str]]()
+        """
+        Images drawn from their DDS file until the texture converter has written their PNG file
+        """
         self.materials = dict[int, MaterialEvent]()
-        self.meshes    = dict[int, bpy.types.Mesh]()
-        self.models    = dict[int, ModelEvent]()
+        self.models    = dict[int, Model]()
+        self.shared_meshes = dict[bytes, bpy.types.Mesh]()
+        """
+        Meshes by the geometry digest of their models, models with identical geometry share one
+        """
         self.entities  = dict[int, bpy.types.Object]()
         self.lights    = dict[int, bpy.types.Object]()
         self.variants  = dict[VariantKey, bpy.types.Material]()
+        self.texture_keys = dict[int, str]()
+        self.known_variants: dict[str, bpy.types.Material] | None = None
+        self.library_variants: dict[str, str] | None = None
         self.overrides = dict[int, dict[int, int]]()
         self.colors    = dict[int, Vec3]()
+        self.clouds    = dict[int, InstanceCloud]()
+        self.instances = dict[int, tuple[InstanceCloud, int]]()
+        self.prototypes = dict[PrototypeKey, int]()
+        self.keyframes = KeyframeBuffer(np.array(view_matrix, dtype=np.float64), options.simplify_tolerance)
+        self.profiler: Profiler | None = None
+        self.time      = 0.0
+        self.start_time = 0.0
         self.frame     = -1
         self.collection_entities = bpy.data.collections.new('Entities')
         self.collection_lights = bpy.data.collections.new('Lights')
         collection.children.link(self.collection_entities)
         collection.children.link(self.collection_lights)
+        # Not linked to the scene, only drawn through the instance clouds
+        self.collection_prototypes = bpy.data.collections.new('Prototypes')
 
 def neg3(a: Vec3) -> Vec3:
     x, y, z = a
@@ -983,161 +854,479 @@ def get_setex() -> bpy.types.ShaderNodeTree:
         return gen_setex_node()
     return setex
 
-def create_texture(event: TextureEvent, dirname: str) -> bpy.types.Image:
-    if event.path is not None:
-        path = os.path.join(dirname, event.path.replace('\\', '/'))
-        for ext in ('.png', '.PNG', '.dds', '.DDS'):
-            if os.path.exists(path + ext):
-                path += ext
-                break
+@typing.no_type_check
+def gen_instance_node() -> bpy.types.GeometryNodeTree:
+    print(f'Generating instance node')
+
+    # Instances the children of "Prototypes" on the points of the mesh.
+    # Points carry the prototype index, the rotation and the frame range they are shown in.
+    tree = bpy.data.node_groups.new(type='GeometryNodeTree', name=NODE_INSTANCES)
+    tree.is_modifier = True
+
+    tree.interface.new_socket(name='Geometry', in_out='INPUT', socket_type='NodeSocketGeometry')
+    tree.interface.new_socket(name='Prototypes', in_out='INPUT', socket_type='NodeSocketCollection')
+    tree.interface.new_socket(name='Geometry', in_out='OUTPUT', socket_type='NodeSocketGeometry')
+
+    group_input = tree.nodes.new('NodeGroupInput')
+    group_input.location = (-800, 0)
+
+    group_output = tree.nodes.new('NodeGroupOutput')
+    group_output.location = (600, 0)
+
+    scene_time = tree.nodes.new('GeometryNodeInputSceneTime')
+    scene_time.location = (-800, -300)
+
+    attr_shown = tree.nodes.new('GeometryNodeInputNamedAttribute')
+    attr_shown.location = (-800, -450)
+    attr_shown.data_type = 'FLOAT'
+    attr_shown.inputs['Name'].default_value = 'nser_shown'
+
+    attr_hidden = tree.nodes.new('GeometryNodeInputNamedAttribute')
+    attr_hidden.location = (-800, -600)
+    attr_hidden.data_type = 'FLOAT'
+    attr_hidden.inputs['Name'].default_value = 'nser_hidden'
+
+    before = tree.nodes.new('FunctionNodeCompare')
+    before.label = 'Before Shown'
+    before.location = (-600, -300)
+    before.data_type = 'FLOAT'
+    before.operation = 'LESS_THAN'
+    tree.links.new(scene_time.outputs['Frame'], before.inputs[0])
+    tree.links.new(attr_shown.outputs['Attribute'], before.inputs[1])
+
+    after = tree.nodes.new('FunctionNodeCompare')
+    after.label = 'After Hidden'
+    after.location = (-600, -500)
+    after.data_type = 'FLOAT'
+    after.operation = 'GREATER_EQUAL'
+    tree.links.new(scene_time.outputs['Frame'], after.inputs[0])
+    tree.links.new(attr_hidden.outputs['Attribute'], after.inputs[1])
+
+    invisible = tree.nodes.new('FunctionNodeBooleanMath')
+    invisible.location = (-400, -400)
+    invisible.operation = 'OR'
+    tree.links.new(before.outputs['Result'], invisible.inputs[0])
+    tree.links.new(after.outputs['Result'], invisible.inputs[1])
+
+    delete = tree.nodes.new('GeometryNodeDeleteGeometry')
+    delete.location = (-200, 0)
+    delete.domain = 'POINT'
+    tree.links.new(group_input.outputs['Geometry'], delete.inputs['Geometry'])
+    tree.links.new(invisible.outputs['Boolean'], delete.inputs['Selection'])
+
+    collection_info = tree.nodes.new('GeometryNodeCollectionInfo')
+    collection_info.location = (-200, -200)
+    collection_info.transform_space = 'ORIGINAL'
+    # Children are sorted by name, prototype names start with their index
+    collection_info.inputs['Separate Children'].default_value = True
+    collection_info.inputs['Reset Children'].default_value = True
+    tree.links.new(group_input.outputs['Prototypes'], collection_info.inputs['Collection'])
+
+    attr_prototype = tree.nodes.new('GeometryNodeInputNamedAttribute')
+    attr_prototype.location = (-200, -400)
+    attr_prototype.data_type = 'INT'
+    attr_prototype.inputs['Name'].default_value = 'nser_prototype'
+
+    attr_rotation = tree.nodes.new('GeometryNodeInputNamedAttribute')
+    attr_rotation.location = (-200, -550)
+    attr_rotation.data_type = 'FLOAT_VECTOR'
+    attr_rotation.inputs['Name'].default_value = 'nser_rotation'
+
+    instance = tree.nodes.new('GeometryNodeInstanceOnPoints')
+    instance.location = (200, 0)
+    instance.inputs['Pick Instance'].default_value = True
+    tree.links.new(delete.outputs['Geometry'], instance.inputs['Points'])
+    tree.links.new(collection_info.outputs['Instances'], instance.inputs['Instance'])
+    tree.links.new(attr_prototype.outputs['Attribute'], instance.inputs['Instance Index'])
+    tree.links.new(attr_rotation.outputs['Attribute'], instance.inputs['Rotation'])
+    tree.links.new(instance.outputs['Instances'], group_output.inputs[0])
+
+    return tree
+
+def get_instance_node() -> bpy.types.GeometryNodeTree:
+    tree = bpy.data.node_groups.get(NODE_INSTANCES)
+    if tree is None or tree.bl_idname != 'GeometryNodeTree':
+        return gen_instance_node()
+    return tree # type: ignore[return-value]
+
+def load_definition(data: Data, ty: EventType[_TE], id: int) -> _TE | None:
+    offset = data.definitions.get((ty.magic, id))
+    if offset is None:
+        return None
+    data.reader.seek(offset)
+    if data.profiler is None:
+        _, event = data.reader.event()
+    else:
+        start = time.perf_counter()
+        _, event = data.reader.event()
+        data.profiler.record_definition(ty, data.reader.tell() - offset, time.perf_counter() - start)
+    return event # type: ignore[return-value]
+
+def get_texture(data: Data, id: int) -> bpy.types.Image | None:
+    texture = data.textures.get(id)
+    if texture is None:
+        event = load_definition(data, EventTypes.Texture, id)
+        if event is None:
+            return None
+        path = get_texture_path(data, event)
+        if path in data.converting and event.data is None:
+            texture = create_texture(event, data.converting[path])
+            data.converted.append((texture, path))
+        else:
+            texture = create_texture(event, path, data.proxy_paths.get(event.id))
+        data.textures[id] = texture
+    return texture
+
+def get_texture_path(data: Data, event: TextureEvent) -> str | None:
+    path = data.texture_paths.get(event.id)
+    if path is None and event.path is not None:
+        path = data.texture_paths[event.id] = resolve_texture_path(data.dirname, event.path)
+    return path
+
+def get_texture_key(data: Data, id: int) -> str:
+    """
+    Capture independent identity of a texture, its game path or else its name
+    """
+    key = data.texture_keys.get(id)
+    if key is None:
+        event = load_definition(data, EventTypes.Texture, id)
+        key = '' if event is None else (event.path or event.name).replace('\\', '/').lower()
+        data.texture_keys[id] = key
+    return key
+
+def get_material_event(data: Data, id: int) -> MaterialEvent | None:
+    event = data.materials.get(id)
+    if event is None:
+        event = load_definition(data, EventTypes.Material, id)
+        if event is None:
+            return None
+        data.materials[id] = event
+    return event
+
+def add_model(data: Data, event: ModelEvent) -> Model:
+    """
+    Creates the mesh of a model, or reuses the one of a model with identical geometry,
+    after which the event and its geometry can be dropped
+    """
+    digest = event.digest
+    mesh = data.shared_meshes.get(digest) if digest is not None else None
+    if mesh is None:
+        with profile_call(data, 'create_mesh'):
+            mesh = create_mesh(event, data.options.weld_vertices)
+        if digest is not None:
+            data.shared_meshes[digest] = mesh
+    model = data.models[event.id] = Model(mesh, event.meshes)
+    return model
+
+def get_model(data: Data, id: int) -> Model:
+    model = data.models.get(id)
+    if model is None:
+        event = load_definition(data, EventTypes.Model, id)
+        if event is None:
+            raise KeyError(f'Model {id} not found')
+        model = add_model(data, event)
+    return model
+
+TEXTURE_SIGNATURES = {
+    b'\x89PNG\r\n\x1a\n': '.png',
+    b'DDS ': '.dds',
+}
+
+def load_embedded_texture(event: TextureEvent) -> bpy.types.Image | None:
+    data = event.data
+    if data is None:
+        return None
+    ext = next((ext for magic, ext in TEXTURE_SIGNATURES.items() if data[:len(magic)] == magic), None)
+    if ext is None:
+        print(f'Unknown embedded texture format for {event.name}')
+        return None
+
+    # Packing from memory lets Blender decode the payload without a temporary file
+    image = bpy.data.images.new(name=event.name, width=1, height=1)
+    image.pack(data=data.tobytes(), data_len=len(data))
+    image.source = 'FILE'
+    image.filepath_raw = os.path.basename((event.path or event.name).replace('\\', '/')) + ext
+    image.colorspace_settings.is_data = True # type: ignore[assignment]
+    return image
+
+def resolve_texture_path(dirname: str, path: str) -> str:
+    """
+    Finds the converted or original file of a game texture path, or returns it without extension
+    """
+    path = os.path.join(dirname, path.replace('\\', '/'))
+    for ext in ('.png', '.PNG', '.dds', '.DDS'):
+        if os.path.exists(path + ext):
+            return path + ext
+    return path
+
+def resolve_textures(data: Data) -> None:
+    """
+    Resolves the file of every texture without an embedded payload up front,
+    the existence checks run on a thread pool as they are slow on network drives
+    """
+    paths = dict[int, str]()
+    for (ty, id) in data.definitions:
+        if ty != EventTypes.Texture.magic:
+            continue
+        event = load_definition(data, EventTypes.Texture, id)
+        if event is not None and event.path is not None and event.data is None:
+            paths[id] = event.path
+
+    with ThreadPoolExecutor(thread_name_prefix='nSEr textures') as pool:
+        resolved = list(pool.map(resolve_texture_path, itertools.repeat(data.dirname), paths.values()))
+        data.texture_paths.update(zip(paths.keys(), resolved))
+        if data.options.proxy_textures:
+            proxies = pool.map(resolve_proxy_path, itertools.repeat(data.dirname), resolved)
+            data.proxy_paths.update((id, proxy) for id, proxy in zip(paths.keys(), proxies) if proxy is not None)
+
+def resolve_proxy_path(dirname: str, path: str) -> str | None:
+    """
+    Finds the proxy of a texture file in a `_proxy` sibling of any of its directories below `dirname`,
+    as written by the texture converter with `--proxy`
+    """
+    file, _ = os.path.splitext(os.path.relpath(path, dirname))
+    parts = file.split(os.sep)
+    for i in range(len(parts) - 1, -1, -1):
+        root = os.path.join(dirname, *parts[:i])
+        proxy = os.path.join(os.path.normpath(root) + PROXY_SUFFIX, *parts[i:]) + '.png'
+        if os.path.exists(proxy):
+            return proxy
+    return None
+
+def convert_textures(data: Data) -> subprocess.Popen | None:
+    """
+    Starts the texture converter on the DDS files of the capture, it writes the PNG files next to them
+    while the import goes on. The textures point at the PNG files from then on.
+    """
+    dds = {id: path for id, path in data.texture_paths.items() if path.lower().endswith('.dds')}
+    if not dds:
+        return None
+
+    args = shlex.split(data.options.texture_converter, posix=os.name != 'nt')
+    if '--resize' not in args:
+        # The converter shrinks textures above 1024 pixels by default, the import wants them at full size
+        args += ['--resize', '1']
+    args += ['--input', data.dirname, '--output', data.dirname, '--list', '-']
+    print(f'Converting {len(dds)} DDS textures with {args}')
+    try:
+        process = subprocess.Popen(args, stdin=subprocess.PIPE, text=True)
+    except OSError as e:
+        print(f'Could not start the texture converter: {e}')
+        return None
+
+    assert process.stdin is not None, 'Converter input should be piped'
+    with process.stdin:
+        for path in dds.values():
+            process.stdin.write(os.path.relpath(path, data.dirname) + '\n')
+
+    for id, path in dds.items():
+        png = os.path.splitext(path)[0] + '.png'
+        data.texture_paths[id] = png
+        data.converting[png] = path
+    return process
+
+def finish_textures(data: Data, process: subprocess.Popen) -> None:
+    """
+    Waits for the texture converter and switches the images it converted to their PNG files,
+    the ones it failed on stay on their DDS files
+    """
+    code = process.wait()
+    if code != 0:
+        print(f'Texture converter exited with {code}')
+
+    loaded = 0
+    for image, path in data.converted:
+        if not os.path.exists(path):
+            continue
+        image.source = 'FILE' # Also when the DDS file could not be loaded
+        image.filepath = path # Reloads the image
+        loaded += 1
+    print(f'Loaded {loaded} of {len(data.converted)} converted textures')
+
+def create_texture(event: TextureEvent, path: str | None, proxy: str | None = None) -> bpy.types.Image:
+    """
+    Creates the image of a texture, from its embedded payload or else its resolved file.
+    Blender only reads the pixels once the image is drawn.
+    """
+    image = load_embedded_texture(event)
+    if image is not None:
+        return image
+
+    if path is not None:
         try:
-            image = bpy.data.images.load(path, check_existing=True)
+            image = bpy.data.images.load(proxy or path, check_existing=True)
             image.colorspace_settings.is_data = True # type: ignore[assignment]
+            if proxy is not None:
+                image[PROXY_PROPERTY] = proxy
+                image[FULL_PROPERTY] = path
             return image
         except:
             pass
     
     return bpy.data.images.new(name=event.name, width=1, height=1)
 
-def create_material(data: Data, event: MaterialEvent) -> bpy.types.Material:
-    color_metal_id = event.textures.get(TextureKind.ColorMetal)
-    normal_gloss_id = event.textures.get(TextureKind.NormalGloss)
-    add_maps_id     = event.textures.get(TextureKind.AddMaps)
-    alpha_mask_id   = event.textures.get(TextureKind.AlphaMask)
-
-    color_metal  = data.textures.get(color_metal_id)  if color_metal_id  else None
-    add_maps     = data.textures.get(add_maps_id)     if add_maps_id     else None
-    normal_gloss = data.textures.get(normal_gloss_id) if normal_gloss_id else None
-    alpha_mask   = data.textures.get(alpha_mask_id)   if alpha_mask_id   else None
+def surface_node_name(render_mode: RenderMode) -> str:
+    if GLASS_HACK and render_mode == RenderMode.Glass:
+        return f'{NODE_SURFACE} Glass Hack'
+    return f'{NODE_SURFACE} {render_mode.name}'
 
-    material = bpy.data.materials.new(name=f'nSEr {event.id} ({event.name})')
-    material.use_nodes = True
-    tree = material.node_tree
-    assert tree is not None, 'Node tree should not be None here'
+@typing.no_type_check
+def gen_surface_node(render_mode: RenderMode, setex: bpy.types.ShaderNodeTree) -> bpy.types.ShaderNodeTree:
+    name = surface_node_name(render_mode)
+    print(f'Generating {name} node')
+
+    # Shared surface of all material variants of a render mode.
+    # Variants only add their image nodes and link them to the inputs,
+    # the input defaults give the look of a missing texture.
+    tree = bpy.data.node_groups.new(type='ShaderNodeTree', name=name)
+    tree.color_tag = 'SHADER'
+
+    socket = tree.interface.new_socket(name='ColorMetal', in_out='INPUT', socket_type='NodeSocketColor')
+    socket.default_value = (0.7297, 0.7297, 0.7297, 1.0) # 0.5 after gamma correction
+    socket.description = 'ColorMetal texture color'
+    socket = tree.interface.new_socket(name='Metal', in_out='INPUT', socket_type='NodeSocketFloat')
+    socket.default_value = 0.0
+    socket.description = 'ColorMetal texture alpha'
+    socket = tree.interface.new_socket(name='NormalGloss', in_out='INPUT', socket_type='NodeSocketColor')
+    socket.default_value = (0.5, 0.5, 1.0, 1.0) # Flat tangent space normal
+    socket.description = 'NormalGloss texture color'
+    socket = tree.interface.new_socket(name='Gloss', in_out='INPUT', socket_type='NodeSocketFloat')
+    socket.default_value = 0.5
+    if render_mode == RenderMode.Glass:
+        socket.default_value = 1.0 if GLASS_HACK else 0.9
+    socket.description = 'NormalGloss texture alpha'
+    socket = tree.interface.new_socket(name='Coloring', in_out='INPUT', socket_type='NodeSocketFloat')
+    socket.default_value = 0.0
+    socket.description = 'AddMaps texture alpha'
+    socket = tree.interface.new_socket(name='Alpha', in_out='INPUT', socket_type='NodeSocketFloat')
+    socket.default_value = 1.0
+    if render_mode == RenderMode.Glass:
+        socket.default_value = 0.9 # Glass without an AlphaMask
+    socket.description = 'AlphaMask texture alpha'
+    tree.interface.new_socket(name='Shader', in_out='OUTPUT', socket_type='NodeSocketShader')
+
+    group_input = tree.nodes.new('NodeGroupInput')
+    group_input.location = (-600, 0)
+
+    group_output = tree.nodes.new('NodeGroupOutput')
+    group_output.location = (800, 0)
+
+    node_attr_colorize = tree.nodes.new('ShaderNodeAttribute')
+    node_attr_colorize.location = (-400, 200)
+    node_attr_colorize.attribute_type = 'OBJECT'
+    node_attr_colorize.attribute_name = 'colorize'
 
-    node_output: bpy.types.ShaderNodeOutputMaterial = tree.nodes.get('Material Output') # type: ignore[assignment]
-    node_output.location = (800, 0)
+    node_gamma = tree.nodes.new('ShaderNodeGamma')
+    node_gamma.label = 'GammaCorrection'
+    node_gamma.location = (-200, 0)
+    node_gamma.inputs['Gamma'].default_value = 2.2
+    tree.links.new(group_input.outputs['ColorMetal'], node_gamma.inputs['Color'])
 
-    if GLASS_HACK and event.render_mode == RenderMode.Glass:
-        node_mix: bpy.types.ShaderNodeMixShader = tree.nodes.new('ShaderNodeMixShader') # type: ignore[assignment]
+    node_setex = tree.nodes.new('ShaderNodeGroup')
+    node_setex.location = (0, 0)
+    node_setex.node_tree = setex
+    tree.links.new(node_gamma.outputs['Color'], node_setex.inputs['Color'])
+    tree.links.new(node_attr_colorize.outputs['Vector'], node_setex.inputs['Colorize'])
+    tree.links.new(group_input.outputs['Coloring'], node_setex.inputs['Coloring'])
+
+    node_normal_map = tree.nodes.new('ShaderNodeNormalMap')
+    node_normal_map.label = 'NormalMap'
+    node_normal_map.location = (0, -200)
+    node_normal_map.inputs['Strength'].default_value = 2.0
+    tree.links.new(group_input.outputs['NormalGloss'], node_normal_map.inputs['Color'])
+
+    node_gloss_invert = tree.nodes.new('ShaderNodeMath')
+    node_gloss_invert.label = 'GlossInvert'
+    node_gloss_invert.location = (0, -400)
+    node_gloss_invert.operation = 'SUBTRACT'
+    node_gloss_invert.inputs[0].default_value = 1.0
+    tree.links.new(group_input.outputs['Gloss'], node_gloss_invert.inputs[1])
+
+    if GLASS_HACK and render_mode == RenderMode.Glass:
+        node_mix = tree.nodes.new('ShaderNodeMixShader')
         node_mix.label = 'Glass Hack'
-        node_mix.location = (400, 0)
-        tree.links.new(node_mix.outputs['Shader'], node_output.inputs['Surface'])
+        node_mix.location = (600, 0)
+        tree.links.new(node_mix.outputs['Shader'], group_output.inputs['Shader'])
 
-        node_fresnel: bpy.types.ShaderNodeFresnel = tree.nodes.new('ShaderNodeFresnel') # type: ignore[assignment]
+        node_fresnel = tree.nodes.new('ShaderNodeFresnel')
         node_fresnel.location = (400, -200)
-        node_fresnel.inputs['IOR'].default_value = 1.45 # type: ignore[assignment]
+        node_fresnel.inputs['IOR'].default_value = 1.45
         tree.links.new(node_fresnel.outputs['Fac'], node_mix.inputs['Fac'])
+        tree.links.new(node_normal_map.outputs['Normal'], node_fresnel.inputs['Normal'])
 
-        node_refraction: bpy.types.ShaderNodeBsdfRefraction = tree.nodes.new('ShaderNodeBsdfRefraction') # type: ignore[assignment]
+        node_refraction = tree.nodes.new('ShaderNodeBsdfRefraction')
         node_refraction.location = (400, -400)
-        node_refraction.inputs['Roughness'].default_value = 0.0 # type: ignore[assignment]
-        node_refraction.inputs['IOR'].default_value = 1.05 # type: ignore[assignment]
+        node_refraction.inputs['IOR'].default_value = 1.05
         tree.links.new(node_refraction.outputs['BSDF'], node_mix.inputs[1])
+        tree.links.new(node_gloss_invert.outputs['Value'], node_refraction.inputs['Roughness'])
+        tree.links.new(node_normal_map.outputs['Normal'], node_refraction.inputs['Normal'])
 
-        node_glossy: bpy.types.ShaderNodeBsdfGlossy = tree.nodes.new('ShaderNodeBsdfGlossy') # type: ignore[assignment]
+        node_glossy = tree.nodes.new('ShaderNodeBsdfGlossy')
         node_glossy.location = (400, -600)
-        node_glossy.inputs['Roughness'].default_value = 0.0 # type: ignore[assignment]
         tree.links.new(node_glossy.outputs['BSDF'], node_mix.inputs[2])
-
-        node_reroute_roughness: bpy.types.NodeReroute = tree.nodes.new('NodeReroute') # type: ignore[assignment]
-        node_reroute_roughness.socket_idname = 'NodeSocketFloat'
-        node_reroute_roughness.location = (380, -150)
-        tree.links.new(node_reroute_roughness.outputs[0], node_refraction.inputs['Roughness'])
-        tree.links.new(node_reroute_roughness.outputs[0], node_glossy.inputs['Roughness'])
-
-        node_reroute_normal: bpy.types.NodeReroute = tree.nodes.new('NodeReroute') # type: ignore[assignment]
-        node_reroute_normal.socket_idname = 'NodeSocketVector'
-        node_reroute_normal.location = (380, -250)
-        tree.links.new(node_reroute_normal.outputs[0], node_fresnel.inputs['Normal'])
-        tree.links.new(node_reroute_normal.outputs[0], node_refraction.inputs['Normal'])
-        tree.links.new(node_reroute_normal.outputs[0], node_glossy.inputs['Normal'])
-
-        socket_color = None
-        socket_metallic = None
-        socket_roughness = node_reroute_roughness.inputs[0]
-        socket_normal = node_reroute_normal.inputs[0]
-        socket_alpha = None
+        tree.links.new(node_gloss_invert.outputs['Value'], node_glossy.inputs['Roughness'])
+        tree.links.new(node_normal_map.outputs['Normal'], node_glossy.inputs['Normal'])
     else:
-        node_bsdf: bpy.types.ShaderNodeBsdfPrincipled = tree.nodes.get('Principled BSDF') # type: ignore[assignment]
+        node_bsdf = tree.nodes.new('ShaderNodeBsdfPrincipled')
         node_bsdf.location = (400, 0)
-        tree.links.new(node_bsdf.outputs['BSDF'], node_output.inputs['Surface'])
-
-        if event.render_mode == RenderMode.Glass:
-            node_bsdf.inputs['Transmission Weight'].default_value = 1.0 # type: ignore[assigment]
-            node_bsdf.inputs['Alpha'].default_value = 0.9 # type: ignore[assigment]
-            if normal_gloss is None:
-                node_bsdf.inputs['Roughness'].default_value = 0.1 # type: ignore[assignment]
-
-        socket_color = node_bsdf.inputs['Base Color']
-        socket_metallic = node_bsdf.inputs['Metallic']
-        socket_roughness = node_bsdf.inputs['Roughness']
-        socket_normal = node_bsdf.inputs['Normal']
-        socket_alpha = node_bsdf.inputs['Alpha']
-
-    node_setex: bpy.types.NodeGroup = tree.nodes.new('ShaderNodeGroup') # type: ignore[assignment]
-    node_setex.location = (200, 0)
-    node_setex.node_tree = data.setex
-    if socket_color is not None:
-        tree.links.new(node_setex.outputs['Color'], socket_color)
-
-    node_attr_colorize: bpy.types.ShaderNodeAttribute = tree.nodes.new('ShaderNodeAttribute') # type: ignore[assignment]
-    node_attr_colorize.location = (-800, 0)
-    node_attr_colorize.attribute_type = 'OBJECT'
-    node_attr_colorize.attribute_name = 'colorize'
-    tree.links.new(node_attr_colorize.outputs['Vector'], node_setex.inputs['Colorize'])
+        tree.links.new(node_bsdf.outputs['BSDF'], group_output.inputs['Shader'])
+
+        if render_mode == RenderMode.Glass:
+            node_bsdf.inputs['Transmission Weight'].default_value = 1.0
 
-    if color_metal is not None:
-        node_gamma: bpy.types.ShaderNodeGamma = tree.nodes.new('ShaderNodeGamma') # type: ignore[assignment]
-        node_gamma.label = 'GammaCorrection'
-        node_gamma.location = (0, 0)
-        node_gamma.inputs['Gamma'].default_value = 2.2 # type: ignore[assignment]
-        tree.links.new(node_gamma.outputs['Color'], node_setex.inputs['Color'])
-
-        node_tex_color: bpy.types.ShaderNodeTexImage = tree.nodes.new('ShaderNodeTexImage') # type: ignore[assignment]
-        node_tex_color.label = 'ColorMetal'
-        node_tex_color.location = (-400, -600)
-        node_tex_color.image = color_metal
-        tree.links.new(node_tex_color.outputs['Color'], node_gamma.inputs['Color'])
-        if socket_metallic is not None:
-            # Use the alpha channel for metallic
-            tree.links.new(node_tex_color.outputs['Alpha'], socket_metallic)
-
-    if add_maps is not None:
-        node_tex_add: bpy.types.ShaderNodeTexImage = tree.nodes.new('ShaderNodeTexImage') # type: ignore[assignment]
-        node_tex_add.label = 'AddMaps'
-        node_tex_add.location = (-400, -200)
-        node_tex_add.image = add_maps
-        tree.links.new(node_tex_add.outputs['Alpha'], node_setex.inputs['Coloring'])
-
-    if normal_gloss is not None:
-        node_tex_normal: bpy.types.ShaderNodeTexImage = tree.nodes.new('ShaderNodeTexImage') # type: ignore[assignment]
-        node_tex_normal.label = 'NormalGloss'
-        node_tex_normal.location = (-400, 200)
-        node_tex_normal.image = normal_gloss
-
-        node_normal_map: bpy.types.ShaderNodeNormalMap = tree.nodes.new('ShaderNodeNormalMap') # type: ignore[assignment]
-        node_normal_map.label = 'NormalMap'
-        node_normal_map.location = (0, -200)
-        node_normal_map.inputs['Strength'].default_value = 2.0 # type: ignore[assignment]   
-        tree.links.new(node_tex_normal.outputs['Color'], node_normal_map.inputs['Color'])
-        tree.links.new(node_normal_map.outputs['Normal'], socket_normal)
-
-        node_gloss_invert: bpy.types.ShaderNodeMath = tree.nodes.new('ShaderNodeMath') # type: ignore[assignment]
-        node_gloss_invert.label = 'GlossInvert'
-        node_gloss_invert.location = (0, 200)
-        node_gloss_invert.operation = 'SUBTRACT'
-        node_gloss_invert.inputs[0].default_value = 1.0 # type: ignore[assignment]
-        tree.links.new(node_tex_normal.outputs['Alpha'], node_gloss_invert.inputs[1])
-        tree.links.new(node_gloss_invert.outputs['Value'], socket_roughness)
-
-    if alpha_mask is not None:
-        node_tex_alpha: bpy.types.ShaderNodeTexImage = tree.nodes.new('ShaderNodeTexImage') # type: ignore[assignment]
-        node_tex_alpha.label = 'AlphaMask'
-        node_tex_alpha.location = (-400, 600)
-        node_tex_alpha.image = alpha_mask
-        if socket_alpha is not None:
-            tree.links.new(node_tex_alpha.outputs['Alpha'], socket_alpha)
+        tree.links.new(group_input.outputs['Alpha'], node_bsdf.inputs['Alpha'])
+
+        tree.links.new(node_setex.outputs['Color'], node_bsdf.inputs['Base Color'])
+        tree.links.new(group_input.outputs['Metal'], node_bsdf.inputs['Metallic'])
+        tree.links.new(node_gloss_invert.outputs['Value'], node_bsdf.inputs['Roughness'])
+        tree.links.new(node_normal_map.outputs['Normal'], node_bsdf.inputs['Normal'])
+
+    return tree
+
+def get_surface_node(render_mode: RenderMode, setex: bpy.types.ShaderNodeTree) -> bpy.types.ShaderNodeTree:
+    tree = bpy.data.node_groups.get(surface_node_name(render_mode))
+    if tree is None or tree.bl_idname != 'ShaderNodeTree':
+        return gen_surface_node(render_mode, setex)
+    return tree # type: ignore[return-value]
+
+TEXTURE_SOCKETS = {
+    TextureKind.ColorMetal:  (-400, (('Color', 'ColorMetal'), ('Alpha', 'Metal'))),
+    TextureKind.NormalGloss: (-100, (('Color', 'NormalGloss'), ('Alpha', 'Gloss'))),
+    TextureKind.AddMaps:     ( 200, (('Alpha', 'Coloring'),)),
+    TextureKind.AlphaMask:   ( 500, (('Alpha', 'Alpha'),)),
+}
+"""
+Vertical position of the image node of each texture kind and the links from its outputs to the surface node inputs
+"""
+
+def create_material(data: Data, event: MaterialEvent, variant: str) -> bpy.types.Material:
+    material = bpy.data.materials.new(name=variant_name(event.name, variant))
+    material[VARIANT_PROPERTY] = variant
+    material.use_nodes = True
+    tree = material.node_tree
+    assert tree is not None, 'Node tree should not be None here'
+
+    tree.nodes.remove(tree.nodes['Principled BSDF'])
+    node_output: bpy.types.ShaderNodeOutputMaterial = tree.nodes.get('Material Output') # type: ignore[assignment]
+    node_output.location = (400, 0)
+
+    node_surface: bpy.types.ShaderNodeGroup = tree.nodes.new('ShaderNodeGroup') # type: ignore[assignment]
+    node_surface.location = (0, 0)
+    node_surface.node_tree = get_surface_node(event.render_mode, data.setex)
+    tree.links.new(node_surface.outputs['Shader'], node_output.inputs['Surface'])
+
+    for kind, (y, links) in TEXTURE_SOCKETS.items():
+        texture_id = event.textures.get(kind)
+        image = get_texture(data, texture_id) if texture_id else None
+        if image is None:
+            continue
+
+        node_tex: bpy.types.ShaderNodeTexImage = tree.nodes.new('ShaderNodeTexImage') # type: ignore[assignment]
+        node_tex.label = kind.name
+        node_tex.location = (-400, -y)
+        node_tex.image = image
+        for output, input in links:
+            tree.links.new(node_tex.outputs[output], node_surface.inputs[input])
 
     return material
 
@@ -1148,47 +1337,148 @@ def get_variant_key(event: MaterialEvent) -> VariantKey:
     alpha_mask_id   = event.textures.get(TextureKind.AlphaMask)
     return (event.render_mode, color_metal_id, normal_gloss_id, add_maps_id, alpha_mask_id)
 
+def get_variant(data: Data, key: VariantKey) -> str:
+    render_mode, *texture_ids = key
+    mode = render_mode.name
+    if GLASS_HACK and render_mode == RenderMode.Glass:
+        mode += ' GlassHack'
+    return '|'.join([mode, *(get_texture_key(data, id) if id is not None else '' for id in texture_ids)])
+
+def variant_digest(variant: str) -> str:
+    """
+    Short hash of a variant key, part of the material name so libraries can be searched by name
+    """
+    return hashlib.blake2b(variant.encode('utf-8'), digest_size=6).hexdigest()
+
+MAX_ID_NAME = 63
+"""
+Bytes Blender keeps of an ID name
+"""
+
+VARIANT_NAME = re.compile(r'\[([0-9a-f]{12})\](?:\.\d+)?$')
+"""
+Digest at the end of a variant material name, before the number Blender adds to duplicates
+"""
+
+def variant_name(name: str, variant: str) -> str:
+    """
+    Material name of a variant, `name` is cut short so the digest always fits
+    """
+    suffix = f' [{variant_digest(variant)}]'
+    budget = MAX_ID_NAME - len('nSEr ') - len(suffix)
+    name = name.encode('utf-8')[:budget].decode('utf-8', errors='ignore')
+    return f'nSEr {name}{suffix}'
+
+def find_variant(data: Data, variant: str) -> bpy.types.Material | None:
+    if data.known_variants is None:
+        data.known_variants = {}
+        for material in bpy.data.materials:
+            known = material.get(VARIANT_PROPERTY)
+            if isinstance(known, str):
+                data.known_variants.setdefault(known, material)
+
+    material = data.known_variants.get(variant)
+    if material is not None or not data.options.material_library:
+        return material
+
+    path = bpy.path.abspath(data.options.material_library)
+    if data.library_variants is None:
+        data.library_variants = {}
+        try:
+            with bpy.data.libraries.load(path, link=True) as (data_from, _):
+                for name in data_from.materials:
+                    match = VARIANT_NAME.search(name)
+                    if match is not None:
+                        data.library_variants.setdefault(match[1], name)
+        except OSError as e:
+            print(f'Could not open material library {path}: {e}')
+
+    name = data.library_variants.get(variant_digest(variant))
+    if name is None:
+        return None
+    with bpy.data.libraries.load(path, link=True) as (_, data_to):
+        data_to.materials = [name]
+    material = data_to.materials[0]
+    if material is None or material.get(VARIANT_PROPERTY) != variant:
+        return None
+    data.known_variants[variant] = material
+    return material
+
 def get_material(data: Data, id: int, overrides: dict[int, int]) -> bpy.types.Material | None:
-    if id not in data.materials:
+    event = get_material_event(data, id)
+    if event is None:
         return None
-    event = data.materials[id]
     if event.render_mode == RenderMode.Glass:
         pass  # TODO: Handle glass materials
     if id in overrides:
-        event = event.merge(data.materials[overrides[id]])
+        override = get_material_event(data, overrides[id])
+        if override is not None:
+            event = event.merge(override)
 
     key = get_variant_key(event)
     if key in data.variants:
         return data.variants[key]
 
-    material = create_material(data, event)
+    variant = get_variant(data, key)
+    material = find_variant(data, variant) if data.options.reuse_materials else None
+    if material is None:
+        with profile_call(data, 'create_material'):
+            material = create_material(data, event, variant)
+        if data.known_variants is not None:
+            data.known_variants[variant] = material
     data.variants[key] = material
     return material
 
-def create_mesh(event: ModelEvent) -> bpy.types.Mesh:
+def create_mesh(event: ModelEvent, weld: bool = False) -> bpy.types.Mesh:
     mesh = bpy.data.meshes.new(f'nSEr MM {event.id} {event.name}')
-    vertices = [swap_yz(v) for v in event.vertices]
-    mesh.from_pydata(vertices, [], event.indices)
 
-    material_index = 0
-    for mesh_info in event.meshes:
+    vertices, normals, tex_coords, indices = event.vertices, event.normals, event.tex_coords, event.indices
+    welded = weld and len(vertices) > 0
+    if welded:
+        vertices, normals, tex_coords, indices = weld_vertices(vertices, normals, tex_coords, indices)
+
+    # foreach_set only takes the fast buffer path for contiguous native arrays
+    vertices = np.ascontiguousarray(vertices[:, (0, 2, 1)], dtype=np.float32)
+    loops = np.ascontiguousarray(indices, dtype=np.int32).ravel()
+    vertex_count = len(vertices)
+    tri_count = len(indices)
+
+    mesh.vertices.add(vertex_count)
+    mesh.vertices.foreach_set('co', vertices.ravel())
+
+    mesh.loops.add(tri_count * 3)
+    mesh.loops.foreach_set('vertex_index', loops)
+
+    mesh.polygons.add(tri_count)
+    mesh.polygons.foreach_set('loop_start', np.arange(0, tri_count * 3, 3, dtype=np.int32))
+
+    material_indices = np.zeros(tri_count, dtype=np.int32)
+    for material_index, mesh_info in enumerate(event.meshes):
         mesh.materials.append(None)
-        for i in range(mesh_info.tri_start, mesh_info.tri_start + mesh_info.tri_count):
-            mesh.polygons[i].material_index = material_index
-        material_index += 1
+        material_indices[mesh_info.tri_start:mesh_info.tri_start + mesh_info.tri_count] = material_index
+    mesh.polygons.foreach_set('material_index', material_indices)
 
     layer = mesh.uv_layers.new()
-    for loop in mesh.loops:
-        layer.uv[loop.index].vector = event.tex_coords[loop.vertex_index]
-    mesh.update()
+    if len(tex_coords) > 0:
+        uvs = np.ascontiguousarray(tex_coords[loops], dtype=np.float32)
+        layer.uv.foreach_set('vector', uvs.ravel())
+
+    mesh.update(calc_edges=True)
+    if welded and len(normals) == vertex_count:
+        # Welded vertices are shared across faces, their captured normals shade them instead of the face normals
+        mesh.shade_smooth()
+        mesh.normals_split_custom_set_from_vertices(np.ascontiguousarray(normals[:, (0, 2, 1)], dtype=np.float32))
+    else:
+        mesh.shade_flat()
 
     return mesh
 
-def create_model(data: Data, event: ModelEvent, overrides: dict[int, int], colorize: Vec3 | None) -> bpy.types.Object:
-    obj = bpy.data.objects.new(f'nSEr SM {event.id}', data.meshes[event.id])
-    data.collection_entities.objects.link(obj)
+def create_model(data: Data, id: int, overrides: dict[int, int], colorize: Vec3 | None, collection: bpy.types.Collection | None = None) -> bpy.types.Object:
+    model = get_model(data, id)
+    obj = bpy.data.objects.new(f'nSEr SM {id}', model.mesh)
+    (collection or data.collection_entities).objects.link(obj)
 
-    for i, mesh_info in enumerate(event.meshes):
+    for i, mesh_info in enumerate(model.meshes):
         obj.material_slots[i].link = 'OBJECT'
         obj.material_slots[i].material = get_material(data, mesh_info.mat_id, overrides)
         obj['colorize'] = (colorize or ColorMask_Default) + (1.0,)
@@ -1196,17 +1486,17 @@ def create_model(data: Data, event: ModelEvent, overrides: dict[int, int], color
     return obj
 
 def set_object_position(data: Data, obj: bpy.types.Object, event: ObjectEvent):
+    """
+    Sets the initial transform of a new object. Local matrices are preferred,
+    world ones are taken as the basis as the exporter only sends them for objects without a parent.
+    """
     obj.rotation_mode = 'QUATERNION'
     if event.lmatrix is not None:
-        matrix = YZ_MATRIX @ Matrix(event.lmatrix) @ YZ_MATRIX
-        matrix.transpose()
-        pos, rot, scale = matrix.decompose()
-
-        obj.location = pos
-        obj.rotation_quaternion = rot
-        obj.scale = scale
+        data.keyframes.init_transform(obj, event.lmatrix, world=False)
     elif event.wmatrix is not None:
-        obj.matrix_world = data.view_matrix @ Matrix(event.wmatrix).transposed() @ YZ_MATRIX
+        data.keyframes.init_transform(obj, event.wmatrix, world=True)
+    else:
+        data.keyframes.init_transform(obj, Mat4_Identity, world=False)
 
 def update_object(data: Data, obj: bpy.types.Object, event: ObjectEvent):
     if event.remove:
@@ -1217,19 +1507,15 @@ def update_object(data: Data, obj: bpy.types.Object, event: ObjectEvent):
 
     if change:
         print('Change visibility', obj.name, show)
-        obj.keyframe_insert('hide_render', frame=data.frame-1)
+        data.keyframes.insert_visibility(obj, data.frame-1, hold=True)
         obj.hide_viewport = not show
         obj.hide_render = not show
-        obj.keyframe_insert('hide_render', frame=data.frame)
+        data.keyframes.insert_visibility(obj, data.frame)
 
-    if event.lmatrix is not None or event.wmatrix is not None:
-        obj.keyframe_insert('location', frame=data.frame-1)
-        obj.keyframe_insert('rotation_quaternion', frame=data.frame-1)
-        obj.keyframe_insert('scale', frame=data.frame-1)
-        set_object_position(data, obj, event)
-        obj.keyframe_insert('location', frame=data.frame)
-        obj.keyframe_insert('rotation_quaternion', frame=data.frame)
-        obj.keyframe_insert('scale', frame=data.frame)
+    if event.lmatrix is not None:
+        data.keyframes.insert_transform(obj, data.frame, event.lmatrix, world=False)
+    elif event.wmatrix is not None:
+        data.keyframes.insert_transform(obj, data.frame, event.wmatrix, world=True)
 
 def create_entity(data: Data, event: EntityEvent) -> bpy.types.Object | None:
     parent = None
@@ -1251,7 +1537,7 @@ def create_entity(data: Data, event: EntityEvent) -> bpy.types.Object | None:
     data.colors[event.id] = color
 
     if event.model is not None:
-        obj = create_model(data, data.models[event.model], overrides, color)
+        obj = create_model(data, event.model, overrides, color)
     else:
         obj = bpy.data.objects.new(f'nSEr EE', None)
         data.collection_entities.objects.link(obj)
@@ -1270,10 +1556,10 @@ def create_entity(data: Data, event: EntityEvent) -> bpy.types.Object | None:
     if data.frame > 0:
         obj.hide_viewport = True
         obj.hide_render = True
-        obj.keyframe_insert('hide_render', frame=data.frame-1)
+        data.keyframes.insert_visibility(obj, data.frame-1)
         obj.hide_viewport = False
         obj.hide_render = False
-        obj.keyframe_insert('hide_render', frame=data.frame)
+        data.keyframes.insert_visibility(obj, data.frame)
 
     return obj
 
@@ -1284,7 +1570,7 @@ def update_entity(data: Data, event: EntityEvent) -> None:
 def create_block(data: Data, event: BlockEvent) -> bpy.types.Object:
     if event.model is not None:
         overrides = dict((o.src_id, o.dst_id) for o in event.overrides)
-        obj = create_model(data, data.models[event.model], overrides, event.color)
+        obj = create_model(data, event.model, overrides, event.color)
         data.overrides[event.id] = overrides
         data.colors[event.id] = event.color
     else:
@@ -1303,10 +1589,77 @@ def update_block(data: Data, event: BlockEvent) -> None:
         print('Removing block', event.id)
 
     if event.remove:
-        obj.keyframe_insert('hide_render', frame=data.frame-1)
+        data.keyframes.insert_visibility(obj, data.frame-1, hold=True)
         obj.hide_viewport = True
         obj.hide_render = True
-        obj.keyframe_insert('hide_render', frame=data.frame)
+        data.keyframes.insert_visibility(obj, data.frame)
+
+def get_prototype(data: Data, model: int, overrides: dict[int, int], color: Vec3) -> int:
+    key = (model, tuple(sorted(overrides.items())), color)
+    index = data.prototypes.get(key)
+    if index is not None:
+        return index
+
+    index = len(data.prototypes)
+    obj = create_model(data, model, overrides, color, data.collection_prototypes)
+    obj.name = f'nSEr BP {index:06} {model}'
+    data.prototypes[key] = index
+    return index
+
+def create_block_instance(data: Data, event: BlockEvent) -> None:
+    assert event.model is not None
+    overrides = dict((o.src_id, o.dst_id) for o in event.overrides)
+    prototype = get_prototype(data, event.model, overrides, event.color)
+
+    matrix = get_matrix(event.translation, event.orientation)
+    rotation = matrix.to_euler()
+
+    cloud = data.clouds.get(event.parent)
+    if cloud is None:
+        cloud = data.clouds[event.parent] = InstanceCloud(event.parent)
+    index = cloud.add(swap_yz(event.translation), tuple(rotation), prototype, data.frame) # type: ignore[arg-type]
+    data.instances[event.id] = (cloud, index)
+
+def update_block_instance(data: Data, event: BlockEvent) -> None:
+    if event.remove:
+        print('Removing block', event.id)
+        cloud, index = data.instances[event.id]
+        cloud.hidden[index] = data.frame
+
+def build_instances(data: Data) -> None:
+    if not data.clouds:
+        return
+
+    tree = get_instance_node()
+    socket = tree.interface.items_tree['Prototypes'].identifier # type: ignore[union-attr]
+
+    for cloud in data.clouds.values():
+        parent = data.entities.get(cloud.parent)
+        if parent is None:
+            print(f'Parent {cloud.parent} not found')
+            continue
+
+        mesh = bpy.data.meshes.new(f'nSEr BI {cloud.parent}')
+        mesh.vertices.add(len(cloud.positions))
+        mesh.vertices.foreach_set('co', np.array(cloud.positions, dtype=np.float32).ravel())
+
+        attr = mesh.attributes.new('nser_rotation', 'FLOAT_VECTOR', 'POINT')
+        attr.data.foreach_set('vector', np.array(cloud.rotations, dtype=np.float32).ravel()) # type: ignore[attr-defined]
+        attr = mesh.attributes.new('nser_prototype', 'INT', 'POINT')
+        attr.data.foreach_set('value', np.array(cloud.prototypes, dtype=np.int32)) # type: ignore[attr-defined]
+        attr = mesh.attributes.new('nser_shown', 'FLOAT', 'POINT')
+        attr.data.foreach_set('value', np.array(cloud.shown, dtype=np.float32)) # type: ignore[attr-defined]
+        attr = mesh.attributes.new('nser_hidden', 'FLOAT', 'POINT')
+        attr.data.foreach_set('value', np.array(cloud.hidden, dtype=np.float32)) # type: ignore[attr-defined]
+        mesh.update()
+
+        obj = bpy.data.objects.new(f'nSEr BI {cloud.parent}', mesh)
+        data.collection_entities.objects.link(obj)
+        obj.parent = parent
+
+        modifier: Any = obj.modifiers.new('nSEr Instances', 'NODES')
+        modifier.node_group = tree
+        modifier[socket] = data.collection_prototypes
 
 LIGHT_YZ_MATRIX = Matrix((
     (1,  0, 0, 0),
@@ -1345,30 +1698,21 @@ def update_light(data: Data, event: LightEvent) -> None:
     obj = data.lights[event.id]
     update_object(data, obj, event)
 
-def handle_event(data: Data, event: Event, dirname: str):
+def handle_event(data: Data, event: Event):
     match event:
         case AdvanceEvent():
             # print(f'Advance delta={event.delta}')
-            data.frame += round(event.delta * FPS)
+            # Frames follow the accumulated time, so resampling does not drift or stall on short deltas
+            data.time += event.delta
+            data.frame = round((data.time - data.start_time) * data.options.fps) - 1
             print(f'Frame {data.frame}\u001b[F')
-        case TextureEvent():
-            # print(f'Texture id={event.id} type={event.ty} name={event.name}')
-            texture = create_texture(event, dirname)
-            data.textures[event.id] = texture
-            
-        case MaterialEvent():
-            # print(f'Material id={event.id} name={event.name} render={event.render_mode} textures={event.textures}')
-            data.materials[event.id] = event
-
-        case ModelEvent():
-            # print(f'Model id={event.id} name={event.name} vertices={len(event.vertices)} normals={len(event.normals)} tex_coords={len(event.tex_coords)} indices={len(event.indices)} meshes={len(event.meshes)}')
-            mesh = create_mesh(event)
-            data.meshes[event.id] = mesh
-            data.models[event.id] = event
+        # Textures, materials and models are not streamed, they are loaded on demand by load_definition
 
         case EntityEvent():
             # print(f'Entity id={event.id} entity={event.entity} name={event.name} model={event.model} color={event.color} preview={event.preview} show={event.show} parent={event.parent} wmatrix={event.wmatrix is not None} lmatrix={event.lmatrix is not None}')
-            if event.id in data.entities:
+            if event.id in data.skipped:
+                pass
+            elif event.id in data.entities:
                 update_entity(data, event)
             else:
                 if not event.preview: # TODO: Make configurable
@@ -1378,8 +1722,15 @@ def handle_event(data: Data, event: Event, dirname: str):
 
         case BlockEvent():
             # print(f'Block id={event.id} position={event.position} model={event.model} color={event.color} translation={event.translation} orientation={event.orientation} entity={event.entity}')
-            if event.id in data.entities:
+            if event.id in data.skipped:
+                pass
+            elif event.id in data.entities:
                 update_block(data, event)
+            elif event.id in data.instances:
+                update_block_instance(data, event)
+            elif data.options.instance_blocks and event.entity is None and event.model is not None:
+                # Blocks with an entity can be parents or get entity updates, those stay objects
+                create_block_instance(data, event)
             else:
                 data.entities[event.id] = create_block(data, event)
 
@@ -1395,7 +1746,32 @@ def handle_event(data: Data, event: Event, dirname: str):
                 obj = create_light(data, event)
                 data.lights[event.id] = obj
 
-def import_semodel(model_path: str, context: bpy.types.Context):
+def profile_phase(data: Data, name: str) -> contextlib.AbstractContextManager[None]:
+    return data.profiler.phase(name) if data.profiler is not None else contextlib.nullcontext()
+
+def profile_call(data: Data, name: str) -> contextlib.AbstractContextManager[None]:
+    return data.profiler.call(name) if data.profiler is not None else contextlib.nullcontext()
+
+def handle_events(data: Data, events: Iterable[Event], substep: ProgressReportSubstep) -> None:
+    profiler = data.profiler
+    last = time.time()
+    count = 0
+
+    for event in events:
+        count += 1
+        if time.time() - last > 1.0:
+            substep.step(nbr=count)
+            count = 0
+            # bpy.ops.wm.redraw_timer(type='DRAW_WIN_SWAP', iterations=1)
+            last = time.time()
+        if profiler is None:
+            handle_event(data, event)
+        else:
+            start = time.perf_counter()
+            handle_event(data, event)
+            profiler.record(event, 'handle_seconds', time.perf_counter() - start)
+
+def import_semodel(model_path: str, context: bpy.types.Context, options: ImportOptions | None = None):
     print('Importing semodel')
 
     scene = context.scene
@@ -1406,52 +1782,99 @@ def import_semodel(model_path: str, context: bpy.types.Context):
 
     wm = bpy.context.window_manager
 
-    with open(model_path, 'rb') as f:
-        r = BinReader(f)
-        assert r.raw(4) == b'nSEr' # magic
-        major = r.u16()
-        minor = r.u16()
-        if major != 1:
-            raise ValueError(f'Unsupported version {major}')
-        print(f'Importing semodel version {major}.{minor}')
-        r.raw(4) # reserved
-
-        header = r.properties()
+    with open(model_path, 'rb') as f, MappedBinReader.map(f) as r:
+        file_header = read_header(r)
+        print(f'Importing semodel version {file_header.major}.{file_header.minor}')
+
+        header = file_header.properties
         anchor = header.get(PropertyTypes.MatrixD, Mat4_Identity)
         print(header)
 
-        data = Data(scene.collection, get_setex(), view_matrix=Matrix(anchor).transposed())
-
-        with ProgressReport(wm) as progress: # type: ignore[context-manager]
-            with ProgressReportSubstep(progress, r.length(), 'Importing') as substep: # type: ignore[context-manager]
-                last = time.time()
-                last_pos = r.tell()
-
-                for event in r.events():
-                    if time.time() - last > 1.0:
-                        pos = r.tell()
-                        substep.step(nbr=pos - last_pos)
-                        last_pos = pos
-                        # bpy.ops.wm.redraw_timer(type='DRAW_WIN_SWAP', iterations=1)
-                        last = time.time()
-                    handle_event(data, event, dirname)
-
-            with ProgressReportSubstep(progress, len(data.entities), 'Cleaning up') as substep: # type: ignore[context-manager]
-                last = time.time()
-                count = 0
-
-                for obj in data.entities.values():
-                    if time.time() - last > 1.0:
-                        substep.step(nbr=count)
-                        count = 0
-                        # bpy.ops.wm.redraw_timer(type='DRAW_WIN_SWAP', iterations=1)
-                        last = time.time()
-                    count += 1
-                    if not len(obj.children) and not obj.data:
-                        bpy.data.objects.remove(obj, do_unlink=True)
-
-            print()
-            print('Done')
+        options = options or ImportOptions()
+        data = Data(scene.collection, get_setex(), view_matrix=Matrix(anchor).transposed(), options=options, reader=r, dirname=dirname)
+        scene.render.fps = options.fps
+        scene.render.fps_base = 1.0
+
+        profiler = data.profiler = Profiler() if options.profile else None
+        try:
+            with profile_phase(data, 'Index'):
+                index = EventIndex.get(model_path, r, cache=options.cache_index)
+                print(f'Indexed {len(index)} events over {len(index.times) - 1} frames')
+
+                for offset, ty, id in zip(*(index.definitions()[field].tolist() for field in ('offset', 'type', 'id'))):
+                    # In file order, so a re-sent definition replaces the earlier one
+                    data.definitions[(ty, id)] = offset
+
+            with profile_phase(data, 'Textures'):
+                resolve_textures(data)
+                print(f'Resolved {len(data.texture_paths)} texture files')
+                converter = convert_textures(data) if options.texture_converter else None
+
+            with profile_phase(data, 'Select'):
+                before, entries, data.start_time = index.window(options.start_time, options.end_time)
+                data.time = data.start_time
+
+                if options.filtered():
+                    objects, lights = select_objects(r, np.concatenate((before, entries)), options.filter_ids, options.filter_name, options.filter_radius, anchor)
+                    print(f'Selected {len(objects)} entities and blocks and {len(lights)} lights')
+                    before = filter_entries(before, objects, lights)
+                    entries = filter_entries(entries, objects, lights)
+
+                folded = fold_entries(r, before)
+                data.skipped = find_empty_objects(r, np.concatenate((folded, entries)), options.instance_blocks)
+                print(f'Skipping {len(data.skipped)} empty entities and blocks')
+
+            with ProgressReport(wm) as progress: # type: ignore[context-manager]
+                if len(folded) > 0:
+                    # State before the window ends up in the initial transforms, without keyframes
+                    print(f'Folding {len(folded)} of {len(before)} events before {data.start_time:.2f}s')
+                    data.keyframes.recording = False
+                    with profile_phase(data, 'Fold'), ProgressReportSubstep(progress, len(folded), 'Folding') as substep: # type: ignore[context-manager]
+                        handle_events(data, decode_entries(r, folded, profiler), substep)
+                    data.keyframes.recording = True
+
+                with profile_phase(data, 'Import'), ProgressReportSubstep(progress, len(entries), 'Importing') as substep: # type: ignore[context-manager]
+                    handle_events(data, decode_entries(r, entries, profiler), substep)
+
+                with profile_phase(data, 'Instances'):
+                    build_instances(data)
+
+                if converter is not None:
+                    with profile_phase(data, 'Convert textures'), ProgressReportSubstep(progress, 1, 'Converting textures') as substep: # type: ignore[context-manager]
+                        finish_textures(data, converter)
+                        substep.step()
+
+                with profile_phase(data, 'Cleanup'), ProgressReportSubstep(progress, 1, 'Cleaning up') as substep: # type: ignore[context-manager]
+                    # obj.children scans every object in the file, collect the parents in one pass instead
+                    parents = {obj.parent.as_pointer() for obj in data.collection_entities.objects if obj.parent is not None}
+                    empty = [obj for obj in data.entities.values() if not obj.data and obj.as_pointer() not in parents]
+                    for obj in empty:
+                        data.keyframes.discard(obj)
+                    if empty:
+                        print(f'Removing {len(empty)} empty entities')
+                        bpy.data.batch_remove(empty)
+                    substep.step()
+
+                with profile_phase(data, 'Keyframes'), ProgressReportSubstep(progress, len(data.keyframes), 'Writing keyframes') as substep: # type: ignore[context-manager]
+                    last = time.time()
+                    count = 0
+
+                    for _ in data.keyframes.flush():
+                        count += 1
+                        if time.time() - last > 1.0:
+                            substep.step(nbr=count)
+                            count = 0
+                            last = time.time()
+
+                print()
+                print('Done')
+
+            if profiler is not None:
+                profiler.print()
+                profiler.save(model_path + '.profile.json')
+        finally:
+            if profiler is not None:
+                profiler.close()
 
 class ImportSEModel(bpy.types.Operator, bpx.io_utils.ImportHelper): # type: ignore[override]
     """Import a .semodel file generated by Never-SErender"""
@@ -1459,6 +1882,106 @@ class ImportSEModel(bpy.types.Operator, bpx.io_utils.ImportHelper): # type: igno
     bl_label = 'Import semodel'
     bl_options = {'REGISTER', 'UNDO'}
 
+    instance_blocks: bpy.props.BoolProperty( # type: ignore[valid-type]
+        name='Instance Blocks',
+        description='Draw blocks without an entity as geometry node instances of one shared mesh per model, material override and color',
+        default=False,
+    )
+
+    weld_vertices: bpy.props.BoolProperty( # type: ignore[valid-type]
+        name='Weld Vertices',
+        description='Merge vertices with identical position, UV and normal, the exporter writes every face with vertices of its own',
+        default=False,
+    )
+
+    fps: bpy.props.IntProperty( # type: ignore[valid-type]
+        name='Frame Rate',
+        description='Frame rate to resample the captured animation to',
+        default=FPS,
+        min=1,
+    )
+
+    simplify_tolerance: bpy.props.FloatProperty( # type: ignore[valid-type]
+        name='Simplify Tolerance',
+        description='Drop transform keys that linear interpolation reproduces within this tolerance (0 keeps all keys)',
+        default=0.0,
+        min=0.0,
+        precision=4,
+    )
+
+    cache_index: bpy.props.BoolProperty( # type: ignore[valid-type]
+        name='Cache Event Index',
+        description='Store the event index next to the capture (<file>.idx) so later imports skip the indexing pass',
+        default=True,
+    )
+
+    start_time: bpy.props.FloatProperty( # type: ignore[valid-type]
+        name='Start Time',
+        description='Capture time in seconds to start importing at, earlier state becomes the initial state',
+        default=0.0,
+        min=0.0,
+        unit='TIME_ABSOLUTE',
+    )
+
+    end_time: bpy.props.FloatProperty( # type: ignore[valid-type]
+        name='End Time',
+        description='Capture time in seconds to stop importing at (0 imports to the end)',
+        default=0.0,
+        min=0.0,
+        unit='TIME_ABSOLUTE',
+    )
+
+    filter_ids: bpy.props.StringProperty( # type: ignore[valid-type]
+        name='Entity Ids',
+        description='Comma separated capture or game ids of the root entities to import, with everything attached to them (empty imports all)',
+        default='',
+    )
+
+    filter_name: bpy.props.StringProperty( # type: ignore[valid-type]
+        name='Entity Name',
+        description='Only import root entities whose name matches this pattern, e.g. "Miner*" (empty imports all)',
+        default='',
+    )
+
+    filter_radius: bpy.props.FloatProperty( # type: ignore[valid-type]
+        name='Radius',
+        description='Only import root entities and lights within this distance of the capture anchor (0 imports all)',
+        default=0.0,
+        min=0.0,
+        unit='LENGTH',
+    )
+
+    reuse_materials: bpy.props.BoolProperty( # type: ignore[valid-type]
+        name='Reuse Materials',
+        description='Use material variants already in this file, e.g. from an earlier import, instead of building them again',
+        default=True,
+    )
+
+    material_library: bpy.props.StringProperty( # type: ignore[valid-type]
+        name='Material Library',
+        description='Optional .blend file to link material variants from before building them',
+        default='',
+        subtype='FILE_PATH',
+    )
+
+    proxy_textures: bpy.props.BoolProperty( # type: ignore[valid-type]
+        name='Proxy Textures',
+        description='Draw textures from the low resolution proxies in _proxy sibling directories (texture converter --proxy). Swap in full resolution from the Render menu before rendering',
+        default=False,
+    )
+
+    texture_converter: bpy.props.StringProperty( # type: ignore[valid-type]
+        name='Texture Converter',
+        description='Command line of texture-converter/main.py, e.g. "python path/to/main.py". When set, the DDS textures of the capture are converted to PNG during the import, at full size unless the command line passes --resize',
+        default='',
+    )
+
+    profile: bpy.props.BoolProperty( # type: ignore[valid-type]
+        name='Profile',
+        description='Report time, bytes and peak memory per event type and import phase to the console and <file>.profile.json. Memory tracing slows the import down',
+        default=False,
+    )
+
     def invoke(self, context: bpy.types.Context, event: bpy.types.Event): # type: ignore[override]
         print('Importing semodel')
         bpx.io_utils.ImportHelper.invoke_popup(self, context)
@@ -1469,23 +1992,88 @@ class ImportSEModel(bpy.types.Operator, bpx.io_utils.ImportHelper): # type: igno
         self.filepath: str
 
         print(self.filepath)
-        import_semodel(self.filepath, context)
+        try:
+            filter_ids = {int(id) for id in self.filter_ids.replace(',', ' ').split()}
+        except ValueError:
+            self.report({'ERROR'}, f'Entity Ids must be whole numbers separated by commas, got "{self.filter_ids}"')
+            return {'CANCELLED'}
+
+        options = ImportOptions(
+            instance_blocks=self.instance_blocks,
+            weld_vertices=self.weld_vertices,
+            fps=self.fps,
+            simplify_tolerance=self.simplify_tolerance,
+            cache_index=self.cache_index,
+            start_time=self.start_time,
+            end_time=self.end_time,
+            filter_ids=filter_ids,
+            filter_name=self.filter_name,
+            filter_radius=self.filter_radius,
+            reuse_materials=self.reuse_materials,
+            material_library=self.material_library,
+            proxy_textures=self.proxy_textures,
+            texture_converter=self.texture_converter,
+            profile=self.profile,
+        )
+        import_semodel(self.filepath, context, options)
 
         return {'FINISHED'}
 
+def set_texture_proxies(proxy: bool) -> list[bpy.types.Image]:
+    """
+    Points the images with a proxy at either their proxy or their full resolution file, returns the images that changed
+    """
+    changed = []
+    key = PROXY_PROPERTY if proxy else FULL_PROPERTY
+    # Only touches images that still exist, bpy.data.images never lists removed ones
+    for image in bpy.data.images:
+        path = image.get(key)
+        if path is None or image.filepath == path:
+            continue
+        image.filepath = path # Reloads the image
+        changed.append(image)
+    return changed
+
+class SwapSEModelTextures(bpy.types.Operator):
+    """Switch imported textures between their viewport proxies and full resolution"""
+    bl_idname = 'image.semodel_texture_proxies'
+    bl_label = 'Swap semodel texture proxies'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    proxy: bpy.props.BoolProperty( # type: ignore[valid-type]
+        name='Use Proxies',
+        description='Draw the low resolution proxies, or the full resolution textures when disabled',
+        default=True,
+    )
+
+    def execute(self, context: bpy.types.Context): # type: ignore
+        # Runs on the main thread, render handlers run on the render job and must not reload images
+        changed = set_texture_proxies(self.proxy)
+        self.report({'INFO'}, f'Swapped {len(changed)} textures')
+        return {'FINISHED'}
+
 def menu_func(self, context):
     self.layout.operator(ImportSEModel.bl_idname, text='Never-SErender (.semodel)')
 
+def render_menu_func(self, context):
+    self.layout.separator()
+    self.layout.operator(SwapSEModelTextures.bl_idname, text='Full Resolution semodel Textures').proxy = False
+    self.layout.operator(SwapSEModelTextures.bl_idname, text='Proxy semodel Textures').proxy = True
+
 def register():
     print('Registering never-serender')
     bpy.utils.register_class(ImportSEModel)
+    bpy.utils.register_class(SwapSEModelTextures)
     bpy.types.TOPBAR_MT_file_import.append(menu_func)
+    bpy.types.TOPBAR_MT_render.append(render_menu_func)
     gen_setex_node()
 
 def unregister():
     print('Unregistering never-serender')
     bpy.utils.unregister_class(ImportSEModel)
+    bpy.utils.unregister_class(SwapSEModelTextures)
     bpy.types.TOPBAR_MT_file_import.remove(menu_func)
+    bpy.types.TOPBAR_MT_render.remove(render_menu_func)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,1398 @@
+"""
+Reader for the .semodel capture format written by Never-SErender.
+
+This module does not depend on Blender, so captures can be inspected and processed in plain CPython:
+
+    python semodel.py capture.semodel
+"""
+from __future__ import annotations
+
+import fnmatch
+import hashlib
+import json
+import math
+import mmap
+import os
+import struct
+import time
+import tracemalloc
+import numpy as np
+
+from contextlib import contextmanager
+from dataclasses import dataclass
+from enum import Enum
+from io import SEEK_CUR, SEEK_END
+from threading import Lock
+from typing import IO, Any, Callable, Generic, Iterable, Iterator, Self, Sequence, TypeVar
+
+Vec3i = tuple[int, int, int]
+
+Vec3i_Zero = (0, 0, 0)
+
+Vec2 = tuple[float, float]
+Vec3 = tuple[float, float, float]
+Vec4 = tuple[float, float, float, float]
+
+Vec3_Zero = (0.0, 0.0, 0.0)
+
+Mat4 = tuple[Vec4, Vec4, Vec4, Vec4]
+
+F4 = np.dtype('>f4')
+I4 = np.dtype('>i4')
+Mat4_Identity = (
+    (1.0, 0.0, 0.0, 0.0),
+    (0.0, 1.0, 0.0, 0.0),
+    (0.0, 0.0, 1.0, 0.0),
+    (0.0, 0.0, 0.0, 1.0)
+)
+
+Vec2Array_Empty = np.empty((0, 2), F4)
+Vec3Array_Empty = np.empty((0, 3), F4)
+Vec3iArray_Empty = np.empty((0, 3), I4)
+
+Color_Default = (1.0, 1.0, 1.0)
+ColorMask_Default = (0.0, 0.0, 0.0)
+
+_T = TypeVar('_T')
+_TE = TypeVar('_TE', bound='Event')
+_D = TypeVar('_D')
+
+def first(values: tuple[Any, ...]) -> Any:
+    return values[0]
+
+class PropertyType(Generic[_T]):
+    """
+    Property with a fixed size value described by a `struct` format and a `convert` from the unpacked tuple,
+    or with a dynamically sized value decoded by `read`
+    """
+    def __init__(self, magic: int, name: str, read: Callable[[BinReader], _T] | str, convert: Callable[[tuple[Any, ...]], _T] = first) -> None:
+        self.magic = magic
+        self.name = name
+        self.struct: struct.Struct | None = None
+        self.convert: Callable[[tuple[Any, ...]], _T] | None = None
+        if isinstance(read, str):
+            s = self.struct = struct.Struct(read)
+            self.convert = convert
+            self.read: Callable[[BinReader], _T] = lambda r: convert(r.unpack(s))
+        else:
+            self.read = read
+
+    def __str__(self) -> str:
+        return f'PropertyType({self.name})'
+
+    def __repr__(self) -> str:
+        return f'PropertyType({self.magic:04X}, {self.name})'
+
+@dataclass(slots=True, frozen=True)
+class Field:
+    """
+    Event field filled from a property
+    """
+    type:    PropertyType[Any] | None
+    """
+    None for a field the event type's `finish` fills in
+    """
+    default: Any = None
+    many:    bool = False
+    """
+    Collects the (key, value) pairs of a repeated property into a dict
+    """
+
+class EventType(Generic[_TE]):
+    """
+    Event with a compiled decoder table, mapping each property magic straight to the position of its field
+    """
+    def __init__(self, magic: int, name: str, cls: type[_TE], fields: tuple[Field, ...] = (), finish: Callable[[_TE, BinReader], None] | None = None) -> None:
+        self.magic = magic
+        self.name = name
+        self.cls = cls
+        self.fields = fields
+        self.finish = finish
+        self.defaults = [None if field.many else field.default for field in fields]
+        self.many = [i for i, field in enumerate(fields) if field.many]
+        self.table = {
+            field.type.magic: (i, field.type.struct, field.type.convert, field.type.read, field.many)
+            for i, field in enumerate(fields) if field.type is not None
+        }
+
+    def read(self, id: int, r: BinReader) -> _TE:
+        event = r.decode(self, id)
+        if self.finish is not None:
+            self.finish(event, r)
+        return event
+
+    def __str__(self) -> str:
+        return f'EventType({self.name})'
+    
+    def __repr__(self) -> str:
+        return f'EventType({self.magic:04X}, {self.name})'
+
+class TextureType(Enum):
+    Auto = 0x00
+    PNG = 0x01
+    DDS = 0x02
+
+class TextureKind(Enum):
+    ColorMetal  = 0x00
+    NormalGloss = 0x01
+    AddMaps     = 0x02
+    AlphaMask   = 0x03
+
+class RenderMode(Enum):
+    Normal = 0x00
+    Glass = 0x01
+
+class Direction(Enum):
+    Forward  = 0
+    Backward = 1
+    Left     = 2
+    Right    = 3
+    Up       = 4
+    Down     = 5
+
+    def vector(self) -> Vec3i:
+        match self:
+            case Direction.Forward:  return ( 0,  0, -1)
+            case Direction.Backward: return ( 0,  0,  1)
+            case Direction.Left:     return (-1,  0,  0)
+            case Direction.Right:    return ( 1,  0,  0)
+            case Direction.Up:       return ( 0,  1,  0)
+            case Direction.Down:     return ( 0, -1,  0)
+
+@dataclass
+class BlockOrientation:
+    forward: Direction
+    up:      Direction
+    right:   Direction
+
+    @classmethod
+    def from_u8(cls, value: int) -> BlockOrientation:
+        return BlockOrientation(
+            Direction(value % 6),
+            Direction((value // 6) % 6),
+            Direction((value // 36) % 6),
+        )
+
+@dataclass
+class MeshInfo:
+    tri_start: int
+    tri_count: int
+    mat_id:    int
+
+@dataclass
+class MaterialOverride:
+    src_id: int
+    dst_id: int
+
+def unpack_color_mask(mask: Vec3i) -> Vec3:
+    hb, sb, vb = mask
+    return (
+        hb / 255.0,
+        (sb / 127.5) - 1.0,
+        (vb / 127.5) - 1.0
+    )
+
+def rows(m: tuple[Any, ...]) -> Mat4:
+    return (m[0:4], m[4:8], m[8:12], m[12:16]) # type: ignore[return-value]
+
+def mesh_infos(r: BinReader) -> list[MeshInfo]:
+    return [MeshInfo(*m) for m in _MESH.iter_unpack(r.raw(r.u32()))]
+
+def material_overrides(r: BinReader) -> list[MaterialOverride]:
+    return [MaterialOverride(*m) for m in _MATOV.iter_unpack(r.raw(r.u32()))]
+
+ORIENTATIONS = tuple(BlockOrientation.from_u8(value) for value in range(256))
+"""
+Decoded block orientations by their byte, shared between all blocks
+"""
+
+class PropertyTypes:
+    EndHeader    = PropertyType[None]                   (0x0000, 'EndHeader',    '',     lambda v: None)
+    Id           = PropertyType[int]                    (0x0108, 'Id',           '>q')
+    Name         = PropertyType[str]                    (0x02FF, 'Name',         lambda r: r.string())
+    Author       = PropertyType[str]                    (0x03FF, 'Author',       lambda r: r.string())
+    Path         = PropertyType[str]                    (0x04FF, 'Path',         lambda r: r.string())
+    Matrix       = PropertyType[Mat4]                   (0x0540, 'Matrix',       '>16f', rows)
+    MatrixD      = PropertyType[Mat4]                   (0x0580, 'MatrixD',      '>16d', rows)
+    TextureType  = PropertyType[TextureType]            (0x0601, 'TextureType',  '>B',   lambda v: TextureType(v[0]))
+    Vertices     = PropertyType[np.ndarray]             (0x07FF, 'Vertices',     lambda r: r.array(F4, 3))
+    Normals      = PropertyType[np.ndarray]             (0x08FF, 'Normals',      lambda r: r.array(F4, 3))
+    TexCoords    = PropertyType[np.ndarray]             (0x09FF, 'TexCoords',    lambda r: r.array(F4, 2))
+    Indices      = PropertyType[np.ndarray]             (0x0AFF, 'Indices',      lambda r: r.array(I4, 3))
+    Meshes       = PropertyType[list[MeshInfo]]         (0x0BFF, 'Meshes',       mesh_infos)
+    MaterialMods = PropertyType[list[MaterialOverride]] (0x0CFF, 'MaterialMods', material_overrides)
+    Model        = PropertyType[int]                    (0x0D04, 'Model',        '>I')
+    Color        = PropertyType[Vec3]                   (0x0E0C, 'Color',        '>fff', tuple)
+    ColorMask    = PropertyType[Vec3]                   (0x0E03, 'ColorMask',    '>BBB', unpack_color_mask)
+    Delta        = PropertyType[float]                  (0x0F04, 'Delta',        '>f')
+    Cone         = PropertyType[Vec2]                   (0x1008, 'Cone',         '>ff',  tuple)
+    Scale        = PropertyType[float]                  (0x1104, 'Scale',        '>f')
+    Remove       = PropertyType[bool]                   (0x1200, 'Remove',       '',     lambda v: True)
+    Preview      = PropertyType[bool]                   (0x1301, 'Preview',      '>B',   lambda v: v[0] != 0)
+    Parent       = PropertyType[int]                    (0x1404, 'Parent',       '>I')
+    Show         = PropertyType[bool]                   (0x1501, 'Show',         '>B',   lambda v: v[0] != 0)
+    RenderMode   = PropertyType[RenderMode]             (0x1601, 'RenderMode',   '>B',   lambda v: RenderMode(v[0]))
+    Texture      = PropertyType[tuple[TextureKind, int]](0x1705, 'Texture',      '>BI',  lambda v: (TextureKind(v[0]), v[1]))
+    Vector3      = PropertyType[Vec3]                   (0x180C, 'Vector3',      '>fff', tuple)
+    Vector3S     = PropertyType[Vec3i]                  (0x1806, 'Vector3S',     '>hhh', tuple)
+    Orientation  = PropertyType[BlockOrientation]       (0x1901, 'Orientation',  '>B',   lambda v: ORIENTATIONS[v[0]])
+
+PropertyTypeMap = dict[int, PropertyType[Any]]()
+for attr in dir(PropertyTypes):
+    if not attr.startswith('_'):
+        prop = getattr(PropertyTypes, attr)
+        if isinstance(prop, PropertyType):
+            PropertyTypeMap[prop.magic] = prop
+
+class Properties:
+    def __init__(self) -> None:
+        self.data = dict[PropertyType[Any], list[Any]]()
+
+    def add(self, key: PropertyType[Any], value: Any) -> None:
+        if key in self.data:
+            self.data[key].append(value)
+        else:
+            self.data[key] = [value]
+
+    def get(self, key: PropertyType[_T], default: _D = None) -> _T | _D:
+        return self.data.get(key, [default])[0]
+
+    def pop(self, key: PropertyType[_T], default: _D = None) -> _T | _D:
+        return self.data.pop(key, [default])[0]
+
+    def get_all(self, key: PropertyType[_T]) -> list[_T]:
+        return self.data.get(key, [])
+
+    def pop_all(self, key: PropertyType[_T]) -> list[_T]:
+        return self.data.pop(key, [])
+
+    def __contains__(self, key: PropertyType[Any]) -> bool:
+        return key in self.data
+    
+    def __str__(self) -> str:
+        return str(self.data)
+    
+    def __repr__(self) -> str:
+        return f'Properties({self.data!r})'
+
+@dataclass(slots=True)
+class Event:
+    id: int
+
+@dataclass(slots=True)
+class BlockEvent(Event):
+    parent:      int
+    position:    Vec3i
+    translation: Vec3
+    orientation: BlockOrientation
+    color:       Vec3
+    entity:      int | None
+    name:        str | None
+    model:       int | None
+    overrides:   Sequence[MaterialOverride]
+    remove:      bool
+
+@dataclass(slots=True)
+class EndEvent(Event):
+    pass
+
+@dataclass(slots=True)
+class AdvanceEvent(Event):
+    delta: float
+
+@dataclass(slots=True)
+class ObjectEvent(Event):
+    lmatrix: Mat4 | None
+    wmatrix: Mat4 | None
+    parent:  int | None
+    show:    bool | None
+    remove:  bool
+
+@dataclass(slots=True)
+class LightEvent(ObjectEvent):
+    color:  Vec3
+    cone:   Vec2 | None
+
+@dataclass(slots=True)
+class EntityEvent(ObjectEvent):
+    entity:  int
+    name:    str | None
+    model:   int | None
+    color:   Vec3 | None
+    preview: bool | None
+
+@dataclass(slots=True)
+class ModelEvent(Event):
+    name:       str
+    vertices:   np.ndarray
+    """
+    Big-endian N×3 float array
+    """
+    normals:    np.ndarray
+    """
+    Big-endian N×3 float array
+    """
+    tex_coords: np.ndarray
+    """
+    Big-endian N×2 float array
+    """
+    indices:    np.ndarray
+    """
+    Big-endian T×3 int array, one row per triangle
+    """
+    meshes:     Sequence[MeshInfo]
+    digest:     bytes | None
+    """
+    Hash of the geometry and triangle ranges, equal for models that can share a mesh
+    """
+
+    def hash_geometry(self, r: BinReader) -> None:
+        h = hashlib.blake2b(digest_size=16)
+        for array in (self.vertices, self.normals, self.tex_coords, self.indices):
+            # The lengths keep one array's data from passing for another's
+            h.update(len(array).to_bytes(4, 'big'))
+            h.update(array)
+        for mesh in self.meshes:
+            h.update(_RANGE.pack(mesh.tri_start, mesh.tri_count))
+        self.digest = h.digest()
+
+@dataclass(slots=True)
+class MaterialEvent(Event):
+    name:         str
+    render_mode:  RenderMode
+    textures:     dict[TextureKind, int]
+
+    def merge(self, other: MaterialEvent) -> MaterialEvent:
+        return MaterialEvent(
+            self.id,
+            f'{other.name}+{self.name}',
+            self.render_mode,
+            self.textures | other.textures
+        )
+
+@dataclass(slots=True)
+class TextureEvent(Event):
+    ty:   TextureType
+    name: str
+    path: str | None
+    data: memoryview | None
+
+    def read_data(self, r: BinReader) -> None:
+        """
+        Views the texture file trailing the properties, if any
+        """
+        data = r.rest_view()
+        self.data = data if len(data) > 0 else None
+
+OBJECT_FIELDS = (
+    Field(PropertyTypes.Matrix),
+    Field(PropertyTypes.MatrixD),
+    Field(PropertyTypes.Parent),
+    Field(PropertyTypes.Show),
+    Field(PropertyTypes.Remove, False),
+)
+
+class EventTypes:
+    End      = EventType[EndEvent]     (0x0000, 'End',      EndEvent)
+    Advance  = EventType[AdvanceEvent] (0x0010, 'Advance',  AdvanceEvent, (
+        Field(PropertyTypes.Delta, 0.0),
+    ))
+    Texture  = EventType[TextureEvent] (0x0020, 'Texture',  TextureEvent, (
+        Field(PropertyTypes.TextureType, TextureType.Auto),
+        Field(PropertyTypes.Name, 'unknown'),
+        Field(PropertyTypes.Path),
+        Field(None), # Data, set by read_data
+    ), TextureEvent.read_data)
+    Material = EventType[MaterialEvent](0x0030, 'Material', MaterialEvent, (
+        Field(PropertyTypes.Name, 'unknown'),
+        Field(PropertyTypes.RenderMode, RenderMode.Normal),
+        Field(PropertyTypes.Texture, many=True),
+    ))
+    Model    = EventType[ModelEvent]   (0x0040, 'Model',    ModelEvent, (
+        Field(PropertyTypes.Name, 'unknown'),
+        Field(PropertyTypes.Vertices, Vec3Array_Empty),
+        Field(PropertyTypes.Normals, Vec3Array_Empty),
+        Field(PropertyTypes.TexCoords, Vec2Array_Empty),
+        Field(PropertyTypes.Indices, Vec3iArray_Empty),
+        Field(PropertyTypes.Meshes, ()),
+        Field(None), # Digest, set by hash_geometry
+    ), ModelEvent.hash_geometry)
+    Entity   = EventType[EntityEvent]  (0x0050, 'Entity',   EntityEvent, OBJECT_FIELDS + (
+        Field(PropertyTypes.Id, -1),
+        Field(PropertyTypes.Name),
+        Field(PropertyTypes.Model),
+        Field(PropertyTypes.ColorMask),
+        Field(PropertyTypes.Preview),
+    ))
+    Block    = EventType[BlockEvent]   (0x0051, 'Block',    BlockEvent, (
+        Field(PropertyTypes.Parent, -1),
+        Field(PropertyTypes.Vector3S, Vec3i_Zero),
+        Field(PropertyTypes.Vector3, Vec3_Zero),
+        Field(PropertyTypes.Orientation, ORIENTATIONS[0]),
+        Field(PropertyTypes.ColorMask, ColorMask_Default),
+        Field(PropertyTypes.Id),
+        Field(PropertyTypes.Name),
+        Field(PropertyTypes.Model),
+        Field(PropertyTypes.MaterialMods, ()),
+        Field(PropertyTypes.Remove, False),
+    ))
+    Light    = EventType[LightEvent]   (0x0060, 'Light',    LightEvent, OBJECT_FIELDS + (
+        Field(PropertyTypes.Color, Color_Default),
+        Field(PropertyTypes.Cone),
+    ))
+
+EventTypeMap = dict[int, EventType[Any]]()
+for attr in dir(EventTypes):
+    if not attr.startswith('_'):
+        event_type = getattr(EventTypes, attr)
+        if isinstance(event_type, EventType):
+            EventTypeMap[event_type.magic] = event_type
+
+_U8   = struct.Struct('>B')
+_U16  = struct.Struct('>H')
+_U32  = struct.Struct('>I')
+_U64  = struct.Struct('>Q')
+_I8   = struct.Struct('>b')
+_I16  = struct.Struct('>h')
+_I32  = struct.Struct('>i')
+_I64  = struct.Struct('>q')
+_F32  = struct.Struct('>f')
+_F64  = struct.Struct('>d')
+_VEC3B = struct.Struct('>BBB')
+_VEC3S = struct.Struct('>hhh')
+_VEC3I = struct.Struct('>iii')
+_VEC2F = struct.Struct('>ff')
+_VEC3F = struct.Struct('>fff')
+_VEC4F = struct.Struct('>ffff')
+_VEC4D = struct.Struct('>dddd')
+_MAT4F = struct.Struct('>16f')
+_MAT4D = struct.Struct('>16d')
+_MESH  = struct.Struct('>III')
+_MATOV = struct.Struct('>II')
+_RANGE = struct.Struct('>II')
+
+class BinReader:
+    def __init__(self, io: IO[bytes], end: int | None = None) -> None:
+        self.io = io
+        self.end = end
+
+    def tell(self) -> int:
+        return self.io.tell()
+
+    def seek(self, pos: int) -> None:
+        self.io.seek(pos)
+
+    def skip(self, n: int) -> None:
+        self.io.seek(n, SEEK_CUR)
+    
+    def length(self) -> int:
+        pos = self.io.tell()
+        self.io.seek(0, SEEK_END)
+        length = self.io.tell()
+        self.io.seek(pos)
+        return length
+
+    def raw(self, n: int) -> bytes:
+        buf = bytearray()
+        if self.end is not None and self.io.tell() + n > self.end:
+            raise ValueError('Attempting to read beyond end of constrained reader')
+        while len(buf) < n:
+            data = self.io.read(n - len(buf))
+            if len(data) == 0:
+                raise EOFError('Unexpected end of data')
+            buf.extend(data)
+        return buf
+    
+    def u(self, n: int) -> int:
+        return int.from_bytes(self.raw(n), 'big')
+
+    def unpack(self, s: struct.Struct) -> tuple[Any, ...]:
+        return s.unpack(self.raw(s.size))
+
+    def u8(self) -> int: return self.u(1)
+    def u16(self) -> int: return self.u(2)
+    def u32(self) -> int: return self.u(4)
+    def u64(self) -> int: return self.u(8)
+
+    def i(self, n: int) -> int:
+        return int.from_bytes(self.raw(n), 'big', signed=True)
+
+    def i8(self) -> int: return self.i(1)
+    def i16(self) -> int: return self.i(2)
+    def i32(self) -> int: return self.i(4)
+    def i64(self) -> int: return self.i(8)
+    
+    def f32(self) -> float: return struct.unpack('>f', self.raw(4))[0]
+    def f64(self) -> float: return struct.unpack('>d', self.raw(8))[0]
+
+    def bool(self) -> bool: return self.u8() != 0
+
+    def vec3b(self) -> Vec3i:
+        return struct.unpack('>BBB', self.raw(3))
+
+    def vec3s(self) -> Vec3i:
+        return struct.unpack('>hhh', self.raw(6))
+
+    def vec3i(self) -> Vec3i:
+        return struct.unpack('>iii', self.raw(12))
+
+    def vec2f(self) -> Vec2:
+        return struct.unpack('>ff', self.raw(8))
+    def vec3f(self) -> Vec3:
+        return struct.unpack('>fff', self.raw(12))
+    def vec4f(self) -> Vec4:
+        return struct.unpack('>ffff', self.raw(16))
+
+    def vec4d(self) -> Vec4:
+        return struct.unpack('>dddd', self.raw(32))
+
+    def mat4f(self) -> tuple[Vec4, Vec4, Vec4, Vec4]:
+        return (self.vec4f(), self.vec4f(), self.vec4f(), self.vec4f())
+
+    def mat4d(self) -> tuple[Vec4, Vec4, Vec4, Vec4]:
+        return (self.vec4d(), self.vec4d(), self.vec4d(), self.vec4d())
+    
+    def string(self) -> str:
+        return self.raw(self.u32()).decode('utf-8')
+
+    def array(self, dtype: np.dtype, width: int) -> np.ndarray:
+        """
+        Reads a sized block of `dtype` items as an N×`width` array
+        """
+        return np.frombuffer(self.raw(self.u32()), dtype).reshape(-1, width)
+    
+    def restrict(self, end: int) -> BinReader:
+        if self.end is not None and end > self.end:
+            raise ValueError('Cannot restrict to a larger end')
+        return BinReader(self.io, end)
+    
+    def sized(self, size: int | None = None) -> BinReader:
+        if size is None:
+            size = self.u32()
+        return self.restrict(self.tell() + size)
+
+    def all(self, f: Callable[[], _T]) -> list[_T]:
+        if self.end is None:
+            raise ValueError('Cannot read all items without end')
+        items = []
+        while self.tell() < self.end:
+            items.append(f())
+        return items
+    
+    def rest(self) -> bytes:
+        if self.end is None:
+            raise ValueError('Cannot read rest without end')
+        return self.io.read(self.end - self.io.tell())
+
+    def rest_view(self) -> memoryview:
+        return memoryview(self.rest())
+
+    def property(self) -> tuple[PropertyType[Any] | None, Any]:
+        val = self.u16()
+        try:
+            ty = PropertyTypeMap[val]
+        except KeyError:
+            self.skip_property(val)
+            return None, None
+        
+        return ty, ty.read(self)
+
+    def properties(self) -> Properties:
+        props = Properties()
+        while True:
+            ty, prop = self.property()
+            if ty is None:
+                continue
+            if ty is PropertyTypes.EndHeader:
+                break
+            props.add(ty, prop)
+        return props
+    
+    def skip_property(self, val: int) -> None:
+        size = val & 0x00FF
+        if size == 0xFF: # Dynamic size
+            size = self.u32()
+        self.skip(size)
+        if val not in PropertyTypeMap:
+            print(f'Skipping unknown property type {val:>04X}')
+
+    def decode(self, ty: EventType[_TE], id: int) -> _TE:
+        """
+        Reads the properties of an event of type `ty` straight into its fields
+        """
+        values = ty.defaults.copy()
+        for i in ty.many:
+            values[i] = {}
+        table = ty.table
+        while True:
+            val = self.u16()
+            if val == 0x0000: # EndHeader
+                break
+            entry = table.get(val)
+            if entry is None:
+                self.skip_property(val)
+                continue
+            i, _, _, read, many = entry
+            if many:
+                key, value = read(self)
+                values[i][key] = value
+            else:
+                values[i] = read(self)
+        return ty.cls(id, *values)
+
+    def scan_properties(self) -> list[int]:
+        """
+        Lists the property types up to the end marker, skipping over their values without decoding them
+        """
+        magics = list[int]()
+        while True:
+            val = self.u16()
+            if val == PropertyTypes.EndHeader.magic:
+                return magics
+            magics.append(val)
+            size = val & 0x00FF
+            if size == 0xFF: # Dynamic size
+                size = self.u32()
+            self.skip(size)
+
+    def header(self) -> tuple[int, int, int]:
+        """
+        Reads an event header and returns its type magic, id and payload size
+        """
+        if self.u16() != 0xC080:
+            raise ValueError('Invalid magic number for event header')
+        val = self.u16()
+        id = self.u32()
+        size = self.u32()
+        return val, id, size
+
+    def event(self) -> tuple[EventType[Any] | None, Event | None]:
+        val, id, size = self.header()
+        pos = self.tell()
+        end = pos + size
+
+        try:
+            ty = EventTypeMap[val]
+        except KeyError:
+            self.seek(end)
+            print(f'Skipping unknown event type {val}')
+            return None, None
+
+        r = self.restrict(end)
+
+        # print(f'Start ty={ty} size={size} pos={pos} end={end}')
+
+        event = ty.read(id, r)
+
+        # print(f'End pos={self.tell()} end={end}')
+
+        self.seek(end)
+        return ty, event
+    
+    def events(self) -> Iterable[Event]:
+        while True:
+            ty, event = self.event()
+            if ty is EventTypes.End:
+                break
+            if event is not None:
+                yield event
+
+    def indexed_events(self, entries: np.ndarray) -> Iterable[Event]:
+        """
+        Reads the events of the given `EventIndex` entries, seeking straight to each of them
+        """
+        for offset in entries['offset'].tolist():
+            self.seek(offset)
+            _, event = self.event()
+            if event is not None:
+                yield event
+
+class Cursor:
+    """
+    Read position shared between a mapped reader and the readers restricted from it
+    """
+    __slots__ = ('pos',)
+
+    def __init__(self, pos: int = 0) -> None:
+        self.pos = pos
+
+class MappedBinReader(BinReader):
+    """
+    Reader over an in-memory buffer (usually a memory-mapped file).
+    Fields are decoded in place with precompiled structs instead of a `read()` per field.
+    """
+    def __init__(self, buf: mmap.mmap | bytes | bytearray, end: int | None = None, cursor: Cursor | None = None) -> None:
+        self.buf = buf
+        self.size = len(buf)
+        self.end = end
+        self.cursor = cursor if cursor is not None else Cursor()
+
+    @classmethod
+    def map(cls, io: IO[bytes]) -> MappedBinReader:
+        return cls(mmap.mmap(io.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def close(self) -> None:
+        if isinstance(self.buf, mmap.mmap):
+            try:
+                self.buf.close()
+            except BufferError:
+                # Arrays still view the mapping, it is released together with them
+                pass
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def tell(self) -> int:
+        return self.cursor.pos
+
+    def seek(self, pos: int) -> None:
+        self.cursor.pos = pos
+
+    def skip(self, n: int) -> None:
+        self.cursor.pos += n
+
+    def length(self) -> int:
+        return self.size
+
+    def advance(self, n: int) -> int:
+        """
+        Moves the cursor forward by `n` bytes and returns the previous position
+        """
+        cursor = self.cursor
+        pos = cursor.pos
+        end = pos + n
+        self.check(end)
+        cursor.pos = end
+        return pos
+
+    def check(self, end: int) -> None:
+        """
+        Raises when reading up to `end` would go beyond the end of the reader or of the data
+        """
+        if self.end is not None and end > self.end:
+            raise ValueError('Attempting to read beyond end of constrained reader')
+        if end > self.size:
+            raise EOFError('Unexpected end of data')
+
+    def unpack(self, s: struct.Struct) -> tuple[Any, ...]:
+        return s.unpack_from(self.buf, self.advance(s.size))
+
+    def raw(self, n: int) -> bytes:
+        pos = self.advance(n)
+        return self.buf[pos:pos + n]
+
+    def decode(self, ty: EventType[_TE], id: int) -> _TE:
+        """
+        Reads the properties of an event of type `ty` straight into its fields.
+        Fixed size values are unpacked in place, only dynamically sized ones go through the reader.
+        """
+        buf = self.buf
+        cursor = self.cursor
+        pos = cursor.pos
+        limit = self.size if self.end is None else min(self.end, self.size)
+        values = ty.defaults.copy()
+        for i in ty.many:
+            values[i] = {}
+        table = ty.table
+        unpack_u16 = _U16.unpack_from
+        while True:
+            if pos + 2 > limit:
+                self.check(pos + 2)
+            val, = unpack_u16(buf, pos)
+            pos += 2
+            if val == 0x0000: # EndHeader
+                break
+            entry = table.get(val)
+            if entry is None:
+                cursor.pos = pos
+                self.skip_property(val)
+                pos = cursor.pos
+                continue
+            i, s, convert, read, many = entry
+            if s is not None:
+                if pos + s.size > limit:
+                    self.check(pos + s.size)
+                value = convert(s.unpack_from(buf, pos))
+                pos += s.size
+            else:
+                cursor.pos = pos
+                value = read(self)
+                pos = cursor.pos
+            if many:
+                values[i][value[0]] = value[1]
+            else:
+                values[i] = value
+        cursor.pos = pos
+        return ty.cls(id, *values)
+
+    def u(self, n: int) -> int:
+        pos = self.advance(n)
+        return int.from_bytes(self.buf[pos:pos + n], 'big')
+
+    def i(self, n: int) -> int:
+        pos = self.advance(n)
+        return int.from_bytes(self.buf[pos:pos + n], 'big', signed=True)
+
+    def u8(self) -> int: return self.unpack(_U8)[0]
+    def u16(self) -> int: return self.unpack(_U16)[0]
+    def u32(self) -> int: return self.unpack(_U32)[0]
+    def u64(self) -> int: return self.unpack(_U64)[0]
+
+    def i8(self) -> int: return self.unpack(_I8)[0]
+    def i16(self) -> int: return self.unpack(_I16)[0]
+    def i32(self) -> int: return self.unpack(_I32)[0]
+    def i64(self) -> int: return self.unpack(_I64)[0]
+
+    def f32(self) -> float: return self.unpack(_F32)[0]
+    def f64(self) -> float: return self.unpack(_F64)[0]
+
+    def vec3b(self) -> Vec3i: return self.unpack(_VEC3B) # type: ignore[return-value]
+    def vec3s(self) -> Vec3i: return self.unpack(_VEC3S) # type: ignore[return-value]
+    def vec3i(self) -> Vec3i: return self.unpack(_VEC3I) # type: ignore[return-value]
+
+    def vec2f(self) -> Vec2: return self.unpack(_VEC2F) # type: ignore[return-value]
+    def vec3f(self) -> Vec3: return self.unpack(_VEC3F) # type: ignore[return-value]
+    def vec4f(self) -> Vec4: return self.unpack(_VEC4F) # type: ignore[return-value]
+
+    def vec4d(self) -> Vec4: return self.unpack(_VEC4D) # type: ignore[return-value]
+
+    def mat4f(self) -> tuple[Vec4, Vec4, Vec4, Vec4]:
+        m = self.unpack(_MAT4F)
+        return (m[0:4], m[4:8], m[8:12], m[12:16]) # type: ignore[return-value]
+
+    def mat4d(self) -> tuple[Vec4, Vec4, Vec4, Vec4]:
+        m = self.unpack(_MAT4D)
+        return (m[0:4], m[4:8], m[8:12], m[12:16]) # type: ignore[return-value]
+
+    def string(self) -> str:
+        n = self.u32()
+        pos = self.advance(n)
+        return str(self.buf[pos:pos + n], 'utf-8')
+
+    def array(self, dtype: np.dtype, width: int) -> np.ndarray:
+        """
+        Reads a sized block of `dtype` items as an N×`width` array viewing the mapped buffer
+        """
+        n = self.u32()
+        pos = self.advance(n)
+        return np.frombuffer(memoryview(self.buf)[pos:pos + n], dtype).reshape(-1, width)
+
+    def restrict(self, end: int) -> MappedBinReader:
+        if self.end is not None and end > self.end:
+            raise ValueError('Cannot restrict to a larger end')
+        return MappedBinReader(self.buf, end, self.cursor)
+
+    def sized(self, size: int | None = None) -> MappedBinReader:
+        if size is None:
+            size = self.u32()
+        return self.restrict(self.cursor.pos + size)
+
+    def all(self, f: Callable[[], _T]) -> list[_T]:
+        if self.end is None:
+            raise ValueError('Cannot read all items without end')
+        cursor = self.cursor
+        end = self.end
+        items = []
+        while cursor.pos < end:
+            items.append(f())
+        return items
+
+    def rest(self) -> bytes:
+        if self.end is None:
+            raise ValueError('Cannot read rest without end')
+        return self.raw(self.end - self.cursor.pos)
+
+    def rest_view(self) -> memoryview:
+        """
+        Views the rest of the constrained reader without copying, pages are only read once the view is
+        """
+        if self.end is None:
+            raise ValueError('Cannot read rest without end')
+        pos = self.advance(self.end - self.cursor.pos)
+        return memoryview(self.buf)[pos:self.end]
+
+EVENT_HEADER_SIZE = 12
+INDEX_MAGIC = b'nSEi'
+INDEX_VERSION = 1
+INDEX_HEADER = struct.Struct('<4sHQQII')
+DEFINITION_TYPES = np.array([EventTypes.Texture.magic, EventTypes.Material.magic, EventTypes.Model.magic], dtype='<u2')
+OBJECT_TYPES = {EventTypes.Entity.magic, EventTypes.Block.magic, EventTypes.Light.magic}
+INDEX_DTYPE = np.dtype([
+    ('offset', '<u8'),
+    ('size',   '<u4'),
+    ('type',   '<u2'),
+    ('id',     '<u4'),
+    ('frame',  '<u4'),
+])
+
+class EventIndex:
+    """
+    Location of every event in a .semodel, so passes can seek straight to the events they need.
+
+    `frame` counts the Advance events before an entry, `times[frame]` is the capture time in seconds at that point.
+    """
+    def __init__(self, entries: np.ndarray, times: np.ndarray) -> None:
+        self.entries = entries
+        self.times = times
+
+    @classmethod
+    def build(cls, r: BinReader) -> EventIndex:
+        """
+        Walks the event headers from the current position up to the End event.
+        Only Advance events are decoded.
+        """
+        entries = list[tuple[int, int, int, int, int]]()
+        times = [0.0]
+        time = 0.0
+
+        while True:
+            offset = r.tell()
+            val, id, size = r.header()
+            if val == EventTypes.End.magic:
+                break
+            entries.append((offset, size, val, id, len(times) - 1))
+            if val == EventTypes.Advance.magic:
+                props = r.sized(size).properties()
+                time += props.get(PropertyTypes.Delta, 0.0)
+                times.append(time)
+            r.seek(offset + EVENT_HEADER_SIZE + size)
+
+        return cls(np.array(entries, dtype=INDEX_DTYPE), np.array(times, dtype='<f8'))
+
+    @classmethod
+    def load(cls, path: str, size: int, mtime: int) -> EventIndex | None:
+        """
+        Loads an index written by `save`, or returns None if it is missing or belongs to a different file state
+        """
+        try:
+            with open(path, 'rb') as f:
+                buf = f.read()
+        except OSError:
+            return None
+
+        if len(buf) < INDEX_HEADER.size:
+            return None
+        magic, version, file_size, file_mtime, count, frames = INDEX_HEADER.unpack_from(buf)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION or file_size != size or file_mtime != mtime:
+            return None
+
+        entries_end = INDEX_HEADER.size + count * INDEX_DTYPE.itemsize
+        if len(buf) != entries_end + frames * 8:
+            return None
+        entries = np.frombuffer(buf, INDEX_DTYPE, count, INDEX_HEADER.size)
+        times = np.frombuffer(buf, '<f8', frames, entries_end)
+        return cls(entries, times)
+
+    def save(self, path: str, size: int, mtime: int) -> None:
+        with open(path, 'wb') as f:
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, size, mtime, len(self.entries), len(self.times)))
+            f.write(self.entries.tobytes())
+            f.write(self.times.tobytes())
+
+    @classmethod
+    def get(cls, model_path: str, r: BinReader, cache: bool = True) -> EventIndex:
+        """
+        Returns the index cached in `<model_path>.idx`, or builds it with `r` positioned at the first event
+        """
+        stat = os.stat(model_path)
+        index_path = model_path + '.idx'
+
+        index = cls.load(index_path, stat.st_size, stat.st_mtime_ns) if cache else None
+        if index is not None:
+            return index
+
+        index = cls.build(r)
+        if cache:
+            try:
+                index.save(index_path, stat.st_size, stat.st_mtime_ns)
+            except OSError as e:
+                print(f'Could not save event index {index_path}: {e}')
+        return index
+
+    def definitions(self) -> np.ndarray:
+        """
+        Entries of the texture, material and model events
+        """
+        return self.entries[np.isin(self.entries['type'], DEFINITION_TYPES)]
+
+    def window(self, start_time: float, end_time: float = 0.0) -> tuple[np.ndarray, np.ndarray, float]:
+        """
+        Splits the entries that are not definitions into those before `start_time` and those up to `end_time` (0 for no end).
+        Also returns the capture time of the first frame in the window.
+        """
+        times = self.times
+        start_frame = min(int(np.searchsorted(times, start_time, 'left')), len(times) - 1)
+        end_frame = len(times) - 1
+        if end_time > 0.0:
+            end_frame = max(int(np.searchsorted(times, end_time, 'right')) - 1, start_frame)
+
+        entries = self.entries[~np.isin(self.entries['type'], DEFINITION_TYPES)]
+        frames = entries['frame']
+        before = entries[frames < start_frame]
+        during = entries[(frames >= start_frame) & (frames <= end_frame)]
+        # The Advance out of the last frame would only move time past the end
+        during = during[(during['frame'] < end_frame) | (during['type'] != EventTypes.Advance.magic)]
+        return before, during, float(times[start_frame])
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+def fold_entries(r: BinReader, entries: np.ndarray) -> np.ndarray:
+    """
+    Picks the object events that decide the state at the end of `entries`:
+    the first event of each object, its last transform, its last visibility change and its removal.
+    Only the property types of the others are scanned, their values are never decoded.
+    """
+    first = dict[tuple[int, int], int]()
+    transform = dict[tuple[int, int], int]()
+    show = dict[tuple[int, int], int]()
+    remove = list[int]()
+
+    for i, (offset, ty, id) in enumerate(zip(entries['offset'].tolist(), entries['type'].tolist(), entries['id'].tolist())):
+        if ty not in OBJECT_TYPES:
+            continue
+        key = (ty, id)
+        if key not in first:
+            first[key] = i
+            continue
+
+        r.seek(offset + EVENT_HEADER_SIZE)
+        magics = r.scan_properties()
+        if PropertyTypes.Matrix.magic in magics or PropertyTypes.MatrixD.magic in magics:
+            transform[key] = i
+        if PropertyTypes.Show.magic in magics:
+            show[key] = i
+        if PropertyTypes.Remove.magic in magics:
+            remove.append(i)
+
+    selected = sorted({*first.values(), *transform.values(), *show.values(), *remove})
+    return entries[selected]
+
+def decode_entries(r: MappedBinReader, entries: np.ndarray, profiler: Profiler | None = None) -> Iterator[Event]:
+    """
+    Decodes the events of index entries as they are consumed, recording them with `profiler`
+    """
+    events = r.indexed_events(entries)
+    if profiler is not None:
+        profiler.count(entries)
+        return profiler.timed(events, 'decode_seconds')
+    return iter(events)
+
+class Profiler:
+    """
+    Collects the wall time, and the peak and retained traced memory of import phases,
+    the count, bytes and time spent per event type, and the count and time of expensive calls
+    """
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.lock = Lock()
+        self.phases = dict[str, dict[str, float]]()
+        self.events = dict[str, dict[str, float]]()
+        self.calls = dict[str, dict[str, float]]()
+        self.tracing = not tracemalloc.is_tracing()
+        if self.tracing:
+            tracemalloc.start()
+
+    def close(self) -> None:
+        if self.tracing and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            self.phases[name] = {'seconds': time.perf_counter() - start, 'peak_bytes': peak, 'retained_bytes': current}
+
+    def stats(self, name: str) -> dict[str, float]:
+        stats = self.events.get(name)
+        if stats is None:
+            stats = self.events[name] = {'count': 0, 'bytes': 0, 'decode_seconds': 0.0, 'handle_seconds': 0.0}
+        return stats
+
+    def count(self, entries: np.ndarray) -> None:
+        types, inverse = np.unique(entries['type'], return_inverse=True)
+        counts = np.bincount(inverse, minlength=len(types))
+        sizes = np.bincount(inverse, weights=entries['size'], minlength=len(types))
+        with self.lock:
+            for ty, count, size in zip(types.tolist(), counts.tolist(), sizes.tolist()):
+                event_type = EventTypeMap.get(ty)
+                stats = self.stats(event_type.name if event_type else f'{ty:>04X}')
+                stats['count'] += count
+                stats['bytes'] += int(size) + EVENT_HEADER_SIZE
+
+    def record(self, event: Event, key: str, seconds: float) -> None:
+        with self.lock:
+            self.stats(type(event).__name__.removesuffix('Event'))[key] += seconds
+
+    def record_definition(self, ty: EventType[Any], size: int, seconds: float) -> None:
+        """
+        Records a definition decoded on demand, these are not among the counted entries
+        """
+        with self.lock:
+            stats = self.stats(ty.name)
+            stats['count'] += 1
+            stats['bytes'] += size
+            stats['decode_seconds'] += seconds
+
+    @contextmanager
+    def call(self, name: str) -> Iterator[None]:
+        """
+        Times a call under `name`, on top of the handle time of the event it runs for
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            with self.lock:
+                stats = self.calls.get(name)
+                if stats is None:
+                    stats = self.calls[name] = {'count': 0, 'seconds': 0.0}
+                stats['count'] += 1
+                stats['seconds'] += seconds
+
+    def timed(self, events: Iterable[Event], key: str) -> Iterator[Event]:
+        """
+        Records the time spent producing each event under `key`
+        """
+        it = iter(events)
+        while True:
+            start = time.perf_counter()
+            try:
+                event = next(it)
+            except StopIteration:
+                return
+            self.record(event, key, time.perf_counter() - start)
+            yield event
+
+    def report(self) -> dict[str, Any]:
+        return {
+            'seconds': time.perf_counter() - self.start,
+            'peak_bytes': max((phase['peak_bytes'] for phase in self.phases.values()), default=0),
+            'phases': self.phases,
+            'events': self.events,
+            'calls': self.calls,
+        }
+
+    def print(self) -> None:
+        report = self.report()
+        print(f'Profile, {report["seconds"]:.2f}s in total, {report["peak_bytes"] / 2**20:.1f} MiB peak')
+        print(f'  {"Phase":<20} {"Seconds":>10} {"Peak MiB":>10} {"Kept MiB":>10}')
+        for name, phase in self.phases.items():
+            print(f'  {name:<20} {phase["seconds"]:>10.3f} {phase["peak_bytes"] / 2**20:>10.1f} {phase["retained_bytes"] / 2**20:>10.1f}')
+        print(f'  {"Event":<20} {"Count":>10} {"MiB":>10} {"Decode s":>10} {"Handle s":>10}')
+        for name, stats in sorted(self.events.items(), key=lambda item: -item[1]['decode_seconds'] - item[1]['handle_seconds']):
+            print(f'  {name:<20} {stats["count"]:>10} {stats["bytes"] / 2**20:>10.1f} {stats["decode_seconds"]:>10.3f} {stats["handle_seconds"]:>10.3f}')
+        if self.calls:
+            print(f'  {"Call":<20} {"Count":>10} {"Seconds":>10}')
+            for name, stats in sorted(self.calls.items(), key=lambda item: -item[1]['seconds']):
+                print(f'  {name:<20} {stats["count"]:>10} {stats["seconds"]:>10.3f}')
+
+    def save(self, path: str) -> None:
+        try:
+            with open(path, 'w') as f:
+                json.dump(self.report(), f, indent=2)
+            print(f'Profile saved to {path}')
+        except OSError as e:
+            print(f'Could not save profile {path}: {e}')
+
+def anchored_distance(wmatrix: Mat4, anchor: Mat4) -> float:
+    """
+    Distance of a world matrix translation from the origin of the anchor space
+    """
+    x, y, z, _ = wmatrix[3]
+    point = (x, y, z, 1.0)
+    return math.sqrt(sum(sum(point[k] * anchor[k][j] for k in range(4)) ** 2 for j in range(3)))
+
+def select_objects(r: BinReader, entries: np.ndarray, ids: set[int], name: str, radius: float, anchor: Mat4) -> tuple[set[int], set[int]]:
+    """
+    Decodes the first event of every entity, block and light and returns the ids of the entities and blocks,
+    and of the lights, to import.
+
+    Root entities are selected when they pass all of the given criteria, empty ones are ignored:
+    their capture or game id is in `ids`, their name matches the glob `name`,
+    and their first world position lies within `radius` of the anchor.
+    Everything parented to a selected entity or block is selected with it.
+    Lights have no parent, they are only filtered by `radius`.
+    """
+    parents = dict[int, int | None]()
+    roots = set[int]()
+    lights = set[int]()
+    seen = set[tuple[int, int]]()
+
+    for offset, ty, id in zip(entries['offset'].tolist(), entries['type'].tolist(), entries['id'].tolist()):
+        if ty not in OBJECT_TYPES or (ty, id) in seen:
+            continue
+        seen.add((ty, id))
+
+        r.seek(offset)
+        _, event = r.event()
+        match event:
+            case BlockEvent():
+                parents.setdefault(id, event.parent)
+            case EntityEvent():
+                parents.setdefault(id, event.parent)
+                if event.parent is not None:
+                    continue
+                if ids and id not in ids and event.entity not in ids:
+                    continue
+                if name and not fnmatch.fnmatchcase(event.name or '', name):
+                    continue
+                if radius > 0.0 and (event.wmatrix is None or anchored_distance(event.wmatrix, anchor) > radius):
+                    continue
+                roots.add(id)
+            case LightEvent():
+                if radius > 0.0 and (event.wmatrix is None or anchored_distance(event.wmatrix, anchor) > radius):
+                    continue
+                lights.add(id)
+
+    selected = dict[int, bool]((id, True) for id in roots)
+    for id in parents:
+        chain = list[int]()
+        current: int | None = id
+        while current is not None and current not in selected:
+            if current in chain: # Parent cycle, never reaches a root
+                current = None
+                break
+            chain.append(current)
+            current = parents.get(current)
+        result = current is not None and selected[current]
+        for link in chain:
+            selected[link] = result
+
+    return {id for id, result in selected.items() if result}, lights
+
+def find_empty_objects(r: BinReader, entries: np.ndarray, instance_blocks: bool) -> set[int]:
+    """
+    Returns the ids of the entities and blocks that would be created without a model and without
+    anything below them that has one, so they can be skipped instead of being created and removed again.
+    Only the event creating each object is decoded.
+    """
+    created = dict[int, tuple[int | None, bool]]()
+    instanced = set[int]()
+    seen = set[int]()
+
+    for offset, ty, id in zip(entries['offset'].tolist(), entries['type'].tolist(), entries['id'].tolist()):
+        if (ty != EventTypes.Entity.magic and ty != EventTypes.Block.magic) or id in seen:
+            continue
+
+        r.seek(offset)
+        _, event = r.event()
+        match event:
+            case EntityEvent():
+                if event.preview:
+                    continue
+                created[id] = (event.parent, event.model is not None)
+            case BlockEvent():
+                if instance_blocks and event.entity is None and event.model is not None:
+                    # Drawn by the instance cloud below the grid
+                    instanced.add(event.parent)
+                else:
+                    created[id] = (event.parent, event.model is not None)
+        seen.add(id)
+
+    needed = set[int]()
+    for id, (parent, has_model) in created.items():
+        if not has_model and id not in instanced:
+            continue
+        current: int | None = id
+        while current is not None and current not in needed:
+            needed.add(current)
+            current = created[current][0] if current in created else None
+
+    return created.keys() - needed
+
+def filter_entries(entries: np.ndarray, objects: set[int], lights: set[int]) -> np.ndarray:
+    """
+    Drops the entity and block events not in `objects` and the light events not in `lights`
+    """
+    types = entries['type']
+    ids = entries['id']
+    is_object = np.isin(types, (EventTypes.Entity.magic, EventTypes.Block.magic))
+    is_light = types == EventTypes.Light.magic
+    keep = (~is_object | np.isin(ids, list(objects))) & (~is_light | np.isin(ids, list(lights)))
+    return entries[keep]
+
+@dataclass
+class FileHeader:
+    major:      int
+    minor:      int
+    properties: Properties
+
+def weld_vertices(vertices: np.ndarray, normals: np.ndarray, tex_coords: np.ndarray, indices: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Merges vertices with bitwise identical position, UV and normal, keeping them in the order they first appear.
+    Returns the merged vertices, normals and UVs, and the triangles remapped to them.
+    Normals and UVs only take part when there is one per vertex,
+    without a UV per vertex the model is returned as is, its UVs could not follow the merge.
+    """
+    count = len(vertices)
+    if len(tex_coords) not in (0, count):
+        return vertices, normals, tex_coords, indices
+
+    columns = [array.astype(np.float32) for array in (vertices, tex_coords, normals) if len(array) == count]
+    # Adding zero turns -0.0 into 0.0, so the two weld
+    keys = np.ascontiguousarray(np.hstack(columns)) + np.float32(0.0)
+    rows = keys.view(np.dtype((np.void, keys.itemsize * keys.shape[1]))).ravel()
+    _, first, inverse = np.unique(rows, return_index=True, return_inverse=True)
+
+    order = np.argsort(first)
+    remap = np.empty_like(order)
+    remap[order] = np.arange(len(order))
+    kept = first[order]
+
+    if len(tex_coords) > 0:
+        tex_coords = tex_coords[kept]
+    if len(normals) == count:
+        normals = normals[kept]
+    return vertices[kept], normals, tex_coords, remap[inverse.ravel()][indices]
+
+def read_header(r: BinReader) -> FileHeader:
+    """
+    Reads the file header, leaving `r` at the first event
+    """
+    if r.raw(4) != b'nSEr':
+        raise ValueError('Not a semodel file')
+    major = r.u16()
+    minor = r.u16()
+    if major != 1:
+        raise ValueError(f'Unsupported version {major}')
+    r.raw(4) # reserved
+    return FileHeader(major, minor, r.properties())
+
+def main(argv: list[str] | None = None) -> None:
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description='Summarize a .semodel capture.')
+    parser.add_argument('path', type=str, help='Capture to read.')
+    parser.add_argument('--no-cache', action='store_true', help='Do not read or write the <file>.idx event index.')
+    parser.add_argument('--events', action='store_true', help='Print every decoded event.')
+    args = parser.parse_args(argv)
+
+    with open(args.path, 'rb') as f, MappedBinReader.map(f) as r:
+        header = read_header(r)
+        print(f'semodel version {header.major}.{header.minor}')
+        print(header.properties)
+
+        index = EventIndex.get(args.path, r, cache=not args.no_cache)
+        print(f'{len(index)} events over {len(index.times) - 1} frames, {index.times[-1]:.2f}s')
+
+        types, counts = np.unique(index.entries['type'], return_counts=True)
+        for ty, count in zip(types.tolist(), counts.tolist()):
+            event_type = EventTypeMap.get(ty)
+            size = int(index.entries['size'][index.entries['type'] == ty].sum())
+            print(f'{event_type.name if event_type else f"{ty:>04X}":<10} {count:>10} events {size:>14} bytes')
+
+        if args.events:
+            for event in r.indexed_events(index.entries):
+                print(event)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'blender'))
+
+from semodel import weld_vertices
+
+def quad(z: float = 0.0) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Two triangles of a quad written per face as the exporter does, 6 vertices of which 4 are distinct
+    """
+    vertices = np.array([[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 0, 0], [1, 1, 0], [0, 1, z]], '>f4')
+    normals = np.tile(np.array([[0, 0, 1]], '>f4'), (6, 1))
+    tex_coords = np.array([[0, 0], [1, 0], [1, 1], [0, 0], [1, 1], [0, 1]], '>f4')
+    indices = np.array([[0, 1, 2], [3, 4, 5]], '>i4')
+    return vertices, normals, tex_coords, indices
+
+def test_weld_keeps_first_appearance_order():
+    vertices, normals, tex_coords, indices = quad()
+    welded, welded_normals, welded_uvs, welded_indices = weld_vertices(vertices, normals, tex_coords, indices)
+
+    assert welded.tolist() == [[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0]]
+    assert welded_indices.tolist() == [[0, 1, 2], [0, 2, 3]]
+    assert np.array_equal(welded[welded_indices], vertices[indices])
+    assert np.array_equal(welded_uvs[welded_indices], tex_coords[indices])
+    assert np.array_equal(welded_normals[welded_indices], normals[indices])
+
+def test_weld_merges_negative_zero():
+    vertices, normals, tex_coords, indices = quad(z=-0.0)
+    vertices[0, 2] = -0.0
+    welded, _, _, _ = weld_vertices(vertices, normals, tex_coords, indices)
+
+    assert len(welded) == 4
+
+def test_weld_splits_on_normals():
+    vertices, normals, tex_coords, indices = quad()
+    normals[3] = (0, 1, 0)
+    welded, welded_normals, _, welded_indices = weld_vertices(vertices, normals, tex_coords, indices)
+
+    assert len(welded) == 5
+    assert np.array_equal(welded_normals[welded_indices], normals[indices])
+
+def test_weld_without_uvs():
+    vertices, normals, _, indices = quad()
+    welded, _, welded_uvs, _ = weld_vertices(vertices, normals, np.empty((0, 2), '>f4'), indices)
+
+    assert len(welded) == 4
+    assert welded_uvs.shape == (0, 2)
+
+def test_weld_skips_models_without_a_uv_per_vertex():
+    vertices, normals, tex_coords, indices = quad()
+    result = weld_vertices(vertices, normals, tex_coords[:3], indices)
+
+    assert result[0] is vertices
+    assert result[2].shape == (3, 2)
+    assert result[3] is indices
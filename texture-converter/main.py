@@ -1,5 +1,6 @@
 import json
 import os
+import sys
 import time
 
 from argparse import ArgumentParser
@@ -18,6 +19,8 @@ DEFAULT_THREADS = os.cpu_count() or 1
 DEFAULT_RESIZE = 0
 DEFAULT_THRESHOLD = 1024
 DEFAULT_RESAMPLING = 'LANCZOS'
+DEFAULT_PROXY = 0
+PROXY_SUFFIX = '_proxy'
 
 parser = ArgumentParser(description='Process DDS textures to PNG format.')
 parser.add_argument('--input', type=str, required=True, help='Input directory containing DDS textures.')
@@ -26,6 +29,8 @@ parser.add_argument('--threads', type=int, default=DEFAULT_THREADS, help=f'Numbe
 parser.add_argument('--resize', type=int, default=DEFAULT_RESIZE, help=f'Resize factor for images. Set to 0 to auto-resize [default: {DEFAULT_RESIZE}]')
 parser.add_argument('--threshold', type=int, default=DEFAULT_THRESHOLD, help=f'Threshold for resizing images. [default: {DEFAULT_THRESHOLD}]')
 parser.add_argument('--resampling', type=str, default=DEFAULT_RESAMPLING, help=f'Resampling method for resizing. [default: {DEFAULT_RESAMPLING}]')
+parser.add_argument('--list', type=str, default=None, help='Only convert the DDS files listed in this file (- for stdin), one path relative to the input directory per line.')
+parser.add_argument('--proxy', type=int, default=DEFAULT_PROXY, help=f'Also write viewport proxies of at most this size to the output directory with a {PROXY_SUFFIX} suffix. Set to 0 to disable [default: {DEFAULT_PROXY}]')
 
 args = parser.parse_args()
 
@@ -35,6 +40,9 @@ THREADS: int = args.threads
 RESIZE: int = args.resize
 THRESHOLD: int = args.threshold
 RESAMPLING: Image.Resampling = getattr(Image.Resampling, args.resampling.upper())
+LIST: str | None = args.list
+PROXY: int = args.proxy
+PROXY_PATH: str = os.path.normpath(OUTPUT_PATH) + PROXY_SUFFIX
 
 console = Console()
 
@@ -100,19 +108,28 @@ def hash_file(path: str) -> str | None:
     except Exception:
         return None
 
-def convert(inpath: str, outpath: str):
+def resize(img: Image.Image, threshold: int, factor: int) -> Image.Image:
+    w, h = img.size
+    if w > threshold and h > threshold:
+        if factor == 0:
+            # Auto-resize to threshold or lower
+            img.thumbnail((threshold, threshold), RESAMPLING)
+        if factor > 1:
+            img = img.resize((w // factor, h // factor), RESAMPLING)
+    return img
+
+def save(img: Image.Image, outpath: str):
     dirname = os.path.dirname(outpath)
     os.makedirs(dirname, exist_ok=True)
-    img = Image.open(inpath)
-    w, h = img.size
-    if w > THRESHOLD and h > THRESHOLD:
-        if RESIZE == 0:
-            # Auto-resize to THRESHOLD or lower
-            img.thumbnail((THRESHOLD, THRESHOLD), RESAMPLING)
-        if RESIZE > 1:
-            img = img.resize((w // RESIZE, h // RESIZE), RESAMPLING)
     img.save(outpath)
 
+def convert(inpath: str, outpath: str, proxypath: str | None = None):
+    img = resize(Image.open(inpath), THRESHOLD, RESIZE)
+    save(img, outpath)
+    if proxypath is not None:
+        # Only ever shrinks further, so it can start from the converted image
+        save(resize(img, PROXY, 0), proxypath)
+
 def convert_worker(index: int, items: Queue[tuple[str, str, int]], total: int, counter: AtomicCount, console: Console, progress: Progress, task: TaskID, status: Status):
     while True:
         try:
@@ -126,12 +143,13 @@ def convert_worker(index: int, items: Queue[tuple[str, str, int]], total: int, c
             relpath = os.path.relpath(path, INPUT_PATH)
             file, _ = os.path.splitext(relpath)
             outpath = os.path.join(OUTPUT_PATH, file + '.png')
+            proxypath = os.path.join(PROXY_PATH, file + '.png') if PROXY > 0 else None
 
             value = counter.increment()
             status.update(f'[yellow]{index + 1:>2}[/] [bright_black]{relpath}[/]')
             progress.update(task, advance=size, description=f'\\[[blue]{value + 1}/{total}[/]]')
 
-            convert(path, outpath)
+            convert(path, outpath, proxypath)
             out_hash = hash_file(outpath)
             if out_hash is not None:
                 cache.set(relpath, (in_hash, out_hash))
@@ -141,6 +159,26 @@ def convert_worker(index: int, items: Queue[tuple[str, str, int]], total: int, c
             items.task_done()
     status.update(f'[yellow]{index + 1:>2}[/] [green]Done[/]')
 
+def list_files(input_path: str, list_path: str) -> tuple[list[tuple[str, int]], int]:
+    paths = list[tuple[str, int]]()
+    total_size = 0
+
+    with (sys.stdin if list_path == '-' else open(list_path, 'r')) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+
+            path = os.path.join(input_path, line)
+            if not path.lower().endswith('.dds') or not os.path.exists(path):
+                continue
+
+            size = os.path.getsize(path)
+            paths.append((path, size))
+            total_size += size
+
+    return paths, total_size
+
 def find_files(input_path: str) -> tuple[list[tuple[str, int]], int]:
     paths = list[tuple[str, int]]()
     total_size = 0
@@ -179,6 +217,9 @@ def scan_files(paths: list[tuple[str, int]], input_path: str, output_path: str,
                 if out_hash_cmp == out_hash:
                     # File is already processed and cached
                     needs_update = False
+
+        if PROXY > 0 and not os.path.exists(os.path.join(PROXY_PATH, file + '.png')):
+            needs_update = True
     
         if needs_update and in_hash_cmp is not None:
             to_process.append((path, in_hash_cmp, size))
@@ -194,7 +235,7 @@ if __name__ == '__main__':
     cache.load(os.path.join(OUTPUT_PATH, 'hashes.json'))
 
     with Status('[green]Finding files...[/]', console=console) as status:
-        paths, paths_size = find_files(INPUT_PATH)
+        paths, paths_size = find_files(INPUT_PATH) if LIST is None else list_files(INPUT_PATH, LIST)
 
     progress = Progress(
         SpinnerColumn(),